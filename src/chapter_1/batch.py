@@ -0,0 +1,150 @@
+"""
+Answer a stream of questions with the chapter 1 chain.
+
+Questions are read as JSONL (`{"id": "...", "question": "..."}`) or as plain text
+lines from a file or stdin, and answers are written to stdout as JSONL in the order
+they complete. At most `--concurrency` questions are in flight at once, so
+throughput scales with the parallel slots of the Ollama server (`OLLAMA_NUM_PARALLEL`).
+
+Usage:
+    python -m src.chapter_1.batch questions.jsonl --concurrency 4 > answers.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+from typing import Any
+
+from langchain_core.runnables import Runnable
+
+from src.chapter_1.chain import build_chain
+
+
+def parse_questions(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """
+    Parse (id, question) pairs from JSONL or plain text lines.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith("{"):
+            record: dict[str, Any] = json.loads(line)
+            yield str(record.get("id", line_number)), str(record["question"])
+        else:
+            yield str(line_number), line
+
+
+async def answer_question(
+    runnable: Runnable[dict[str, Any], str], question_id: str, question: str
+) -> dict[str, Any]:
+    """
+    Stream the answer to a single question, recording its latency.
+    """
+    started = time.perf_counter()
+    first_token_ms: float | None = None
+    chunks: list[str] = []
+
+    try:
+        async for chunk in runnable.astream({"question": question}):
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - started) * 1000
+            chunks.append(chunk)
+    except Exception as error:
+        return {
+            "id": question_id,
+            "question": question,
+            "error": str(error),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    return {
+        "id": question_id,
+        "question": question,
+        "answer": "".join(chunks).strip(),
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "time_to_first_token_ms": round(first_token_ms or 0.0, 1),
+    }
+
+
+async def answer_questions(
+    questions: Iterable[tuple[str, str]], concurrency: int = 4
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Answer questions with bounded concurrency, yielding results as they complete.
+
+    Questions are pulled lazily from the iterable, so arbitrarily long streams are
+    processed with at most `concurrency` requests in flight.
+    """
+    runnable = build_chain()
+    pending: set[asyncio.Task[dict[str, Any]]] = set()
+
+    for question_id, question in questions:
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+
+        pending.add(
+            asyncio.create_task(answer_question(runnable, question_id, question))
+        )
+
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task.result()
+
+
+async def run(lines: Iterable[str], concurrency: int) -> None:
+    """
+    Answer every question in `lines` and write the results to stdout as JSONL.
+    """
+    started = time.perf_counter()
+    count = 0
+
+    async for result in answer_questions(parse_questions(lines), concurrency):
+        count += 1
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Answered {count} questions in {elapsed:.1f}s "
+        f"({count / elapsed if elapsed else 0.0:.2f} questions/s)",
+        file=sys.stderr,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Answer a stream of questions with the chapter 1 chain."
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="JSONL or text file with one question per line (default: stdin)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of questions in flight (match OLLAMA_NUM_PARALLEL)",
+    )
+    args = parser.parse_args()
+
+    if args.input == "-":
+        asyncio.run(run(sys.stdin, args.concurrency))
+    else:
+        with open(args.input) as f:
+            asyncio.run(run(f, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,49 @@
+from typing import Any
+
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable
 from langchain_ollama import ChatOllama
 
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+
 template = """
 You are a helpful assistant. Answer the following question:
 {question}
 """
 
 
-def chain() -> None:
+def build_chain() -> Runnable[dict[str, Any], str]:
     """
-    This is a simple example of how to use the LangChain library to create a chain of prompts and a model.
-    This chain uses the Ollama model to generate a response to the user's question.
+    Build the prompt, model and output parser pipeline used to answer questions.
     """
-
     prompt = PromptTemplate(
         input_variables=["question"],
         template=template,
     )
 
-    llm = ChatOllama(model="deepseek-r1:8b", temperature=0.0)
+    llm = ChatOllama(
+        model="deepseek-r1:8b",
+        temperature=0.0,
+        cache=llm_cache(),
+        callbacks=telemetry_callbacks(),
+    )
+
+    return prompt | llm | StrOutputParser()
 
-    chain = prompt | llm | StrOutputParser()
 
-    response = chain.invoke(input={"question": "What is the capital of Spain?"})
+def chain() -> None:
+    """
+    This is a simple example of how to use the LangChain library to create a chain of prompts and a model.
+    This chain uses the Ollama model to generate a response to the user's question.
+    """
+
+    chain = build_chain()
+
+    response = chain.invoke(
+        input={"question": "What is the capital of Spain?"},
+        config={"callbacks": telemetry_callbacks()},
+    )
 
     print(response)
@@ -0,0 +1,297 @@
+"""
+Bulk profile summarization with checkpoint/resume.
+
+Rows of a CSV or JSONL file with `full_name`, `company_name` and `job_title` columns
+(and an optional `id`) flow through three pipelined stages connected by bounded
+queues: profile URL lookup, profile fetch and LLM summarization. Each stage has its
+own concurrency limit, so slow LLM calls overlap with lookups and fetches.
+
+Results are appended to a JSONL file as soon as they complete and the ids of
+completed rows are appended to a checkpoint file, so a crashed run resumes without
+redoing them. Failed rows are written with an `error` field and retried on resume,
+and only the latest row of every id is kept when resuming and exporting.
+
+Usage:
+    python -m src.chapter_2.bulk people.csv summaries.jsonl --summarize-workers 4
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.chapter_2.chain import build_summary_chain, lookup_linkedin_profile_url
+from src.chapter_2.compaction import DEFAULT_TOKEN_BUDGET, compact_profile
+from src.chapter_2.linkedin.api import get_linkedin_profile
+
+
+@dataclass
+class Job:
+    """A row moving through the pipeline."""
+
+    row_id: str
+    row: dict[str, str]
+    linkedin_profile_url: str = ""
+    linkedin_profile: dict[str, Any] = field(default_factory=dict)
+    result: dict[str, Any] = field(default_factory=dict)
+
+
+def row_id(row: dict[str, str]) -> str:
+    """The explicit `id` of a row, or a hash of its normalized person fields."""
+    if row.get("id"):
+        return row["id"]
+    key = "|".join(
+        " ".join(row.get(column, "").lower().split())
+        for column in ("full_name", "company_name", "job_title")
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def read_rows(path: str) -> Iterator[dict[str, str]]:
+    """
+    Read rows lazily from a CSV or JSONL file, skipping JSONL lines that are not
+    valid JSON, such as one cut short by an interrupted write.
+    """
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as error:
+                    print(f"Skipping line {number} of {path}: {error}", file=sys.stderr)
+        else:
+            yield from csv.DictReader(f)
+
+
+def read_checkpoint(path: str) -> set[str]:
+    """Ids of the rows completed by previous runs."""
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def compact_results(path: str) -> int:
+    """
+    Rewrite the results keeping only the latest row of every id, so that the rows
+    of failed attempts do not pile up across runs. A row torn by an interrupted
+    write is dropped too, its id is not checkpointed so the row is redone. Returns
+    the rows dropped.
+    """
+    if not os.path.exists(path):
+        return 0
+    latest: dict[str, str] = {}
+    total = 0
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                total += 1
+                try:
+                    record_id = json.loads(line)["id"]
+                except (json.JSONDecodeError, KeyError):
+                    continue
+                # Re-inserted, so that the rows stay in completion order.
+                latest.pop(record_id, None)
+                latest[record_id] = line if line.endswith("\n") else line + "\n"
+    if len(latest) < total:
+        with open(f"{path}.tmp", "w") as f:
+            f.writelines(latest.values())
+        os.replace(f"{path}.tmp", path)
+    return total - len(latest)
+
+
+class BulkRunner:
+    """
+    Pipelined lookup -> fetch -> summarize runner with bounded stage queues.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        checkpoint_path: str,
+        lookup_workers: int = 4,
+        fetch_workers: int = 8,
+        summarize_workers: int = 2,
+        queue_size: int = 32,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        mock: bool = True,
+    ) -> None:
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path
+        self.workers = {
+            "lookup": lookup_workers,
+            "fetch": fetch_workers,
+            "summarize": summarize_workers,
+        }
+        self.token_budget = token_budget
+        self.mock = mock
+        self.summary_chain = build_summary_chain()
+
+        self.queues: dict[str, asyncio.Queue[Job]] = {
+            stage: asyncio.Queue(maxsize=queue_size)
+            for stage in ("lookup", "fetch", "summarize", "write")
+        }
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    async def lookup(self, job: Job) -> None:
+        job.linkedin_profile_url = await asyncio.to_thread(
+            lookup_linkedin_profile_url,
+            full_name=job.row["full_name"],
+            company_name=job.row.get("company_name", ""),
+            job_title=job.row.get("job_title", ""),
+        )
+        if not job.linkedin_profile_url:
+            raise ValueError("No LinkedIn profile URL found")
+
+    async def fetch(self, job: Job) -> None:
+        job.linkedin_profile = await asyncio.to_thread(
+            get_linkedin_profile,
+            linkedin_profile_url=job.linkedin_profile_url,
+            mock=self.mock,
+        )
+        if not job.linkedin_profile:
+            raise ValueError("No LinkedIn profile found")
+
+    async def summarize(self, job: Job) -> None:
+        compact = compact_profile(job.linkedin_profile, token_budget=self.token_budget)
+        summary = await self.summary_chain.ainvoke({"linkedin_profile": compact.text})
+        job.result = {
+            "summary": summary.model_dump(),
+            "linkedin_profile_url": job.linkedin_profile_url,
+            "picture_url": job.linkedin_profile.get("photoUrl", ""),
+        }
+
+    async def stage_worker(self, stage: str, next_stage: str) -> None:
+        """
+        Process jobs of a stage and hand them over to the next one.
+        Failed jobs skip the remaining stages and go straight to the writer.
+        """
+        handler = getattr(self, stage)
+        queue = self.queues[stage]
+        while True:
+            job = await queue.get()
+            try:
+                await handler(job)
+                await self.queues[next_stage].put(job)
+            except Exception as error:
+                job.result = {"error": f"{stage}: {error}"}
+                await self.queues["write"].put(job)
+            finally:
+                queue.task_done()
+
+    async def writer(self) -> None:
+        """
+        Append results to the output file and completed ids to the checkpoint.
+        """
+        queue = self.queues["write"]
+        with (
+            open(self.output_path, "a") as output,
+            open(self.checkpoint_path, "a") as checkpoint,
+        ):
+            while True:
+                job = await queue.get()
+                record = {"id": job.row_id, **job.row, **job.result}
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+
+                if "error" in job.result:
+                    self.failed += 1
+                else:
+                    # The result is flushed before the id is checkpointed, so a
+                    # crash in between only duplicates a row, never loses one.
+                    checkpoint.write(job.row_id + "\n")
+                    checkpoint.flush()
+                    self.completed += 1
+
+                queue.task_done()
+
+    async def run(self, input_path: str) -> None:
+        done = read_checkpoint(self.checkpoint_path)
+        compact_results(self.output_path)
+        stages = ["lookup", "fetch", "summarize", "write"]
+
+        tasks = [asyncio.create_task(self.writer())]
+        for stage, next_stage in zip(stages, stages[1:], strict=False):
+            tasks += [
+                asyncio.create_task(self.stage_worker(stage, next_stage))
+                for _ in range(self.workers[stage])
+            ]
+
+        started = time.perf_counter()
+        for row in read_rows(input_path):
+            job = Job(row_id=row_id(row), row=row)
+            if job.row_id in done:
+                self.skipped += 1
+                continue
+            await self.queues["lookup"].put(job)
+
+        # Drain the stages in order, since each one feeds the next.
+        for stage in stages:
+            await self.queues[stage].join()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        print(
+            f"Completed {self.completed}, failed {self.failed}, skipped {self.skipped} "
+            f"(already done) in {time.perf_counter() - started:.1f}s",
+            file=sys.stderr,
+        )
+
+
+def write_parquet(jsonl_path: str, parquet_path: str) -> None:
+    """
+    Convert the JSONL results to Parquet (requires pyarrow), keeping the latest row
+    of every id.
+    """
+    import pandas  # type: ignore[import-untyped]
+
+    results = pandas.read_json(jsonl_path, lines=True, dtype={"id": str})
+    results.drop_duplicates("id", keep="last").to_parquet(parquet_path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize profiles in bulk.")
+    parser.add_argument("input", help="CSV or JSONL file of people")
+    parser.add_argument("output", help="JSONL file the summaries are appended to")
+    parser.add_argument("--checkpoint", help="Default: <output>.checkpoint")
+    parser.add_argument("--parquet", help="Also write the results to this file")
+    parser.add_argument("--lookup-workers", type=int, default=4)
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--summarize-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    parser.add_argument(
+        "--real", action="store_true", help="Fetch real profiles instead of mocks"
+    )
+    args = parser.parse_args()
+
+    runner = BulkRunner(
+        output_path=args.output,
+        checkpoint_path=args.checkpoint or f"{args.output}.checkpoint",
+        lookup_workers=args.lookup_workers,
+        fetch_workers=args.fetch_workers,
+        summarize_workers=args.summarize_workers,
+        queue_size=args.queue_size,
+        token_budget=args.token_budget,
+        mock=not args.real,
+    )
+    asyncio.run(runner.run(args.input))
+
+    if args.parquet:
+        write_parquet(args.output, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
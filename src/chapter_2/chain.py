@@ -1,9 +1,19 @@
+import logging
+from typing import Any
+
 from langchain.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
 from langchain_ollama import ChatOllama
 
+from src.chapter_2.compaction import DEFAULT_TOKEN_BUDGET, compact_profile
 from src.chapter_2.linkedin.agent import linkedin_lookup_agent
 from src.chapter_2.linkedin.api import get_linkedin_profile
+from src.chapter_2.linkedin.directory import is_profile_url, profile_directory
 from src.chapter_2.output_parsers import Summary, summary_output_parser
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+
+logger = logging.getLogger(__name__)
 
 summary_template = """
 Given the LinkedIn profile about a person:
@@ -16,24 +26,128 @@ I want you to:
 2. Two interesting facts about them.
 3. Identify the most recent work experience (based on the positions rather than the summary) and estimate how much they might earn based on that experience.
 4. Recommend upskilling aligned with their experience that may help them increase total compensation.
+"""
 
+format_instructions_template = """
 Your response should be in the following format:
 
 {format_instructions}
 """
 
 
+def lookup_linkedin_profile_url(
+    full_name: str,
+    company_name: str,
+    job_title: str,
+) -> str:
+    """
+    Find a LinkedIn profile URL in the local directory, falling back to the agent.
+    URLs resolved by the agent are written back so repeat lookups stay local, unless
+    they do not look like the profile of that person.
+    """
+    directory = profile_directory()
+
+    linkedin_profile_url = directory.lookup(full_name, company_name, job_title)
+    if linkedin_profile_url:
+        return linkedin_profile_url
+
+    linkedin_profile_url = linkedin_lookup_agent(
+        full_name=full_name,
+        company_name=company_name,
+        job_title=job_title,
+    ).strip()
+
+    if is_profile_url(linkedin_profile_url, full_name):
+        directory.add(
+            url=linkedin_profile_url,
+            full_name=full_name,
+            companies=[company_name],
+            job_titles=[job_title],
+        )
+
+    return linkedin_profile_url
+
+
+def summary_prompt_and_llm(
+    structured_output: bool = True,
+) -> tuple[PromptTemplate, ChatOllama]:
+    """
+    Build the summarization prompt and model.
+
+    With `structured_output`, the `Summary` JSON schema is passed to Ollama's native
+    structured output support, which constrains decoding to valid `Summary` JSON, so
+    the verbose format instructions are left out of the prompt. Otherwise the parser's
+    format instructions are included and the model is trusted to follow them.
+    """
+    if structured_output:
+        prompt = PromptTemplate(
+            input_variables=["linkedin_profile"],
+            template=summary_template,
+        )
+        llm = ChatOllama(
+            model="llama3.1:8b",
+            temperature=0.0,
+            verbose=True,
+            format=Summary.model_json_schema(),
+            cache=llm_cache(),
+            callbacks=telemetry_callbacks(),
+        )
+    else:
+        prompt = PromptTemplate(
+            input_variables=["linkedin_profile"],
+            template=summary_template + format_instructions_template,
+            partial_variables={
+                "format_instructions": summary_output_parser.get_format_instructions()
+            },
+        )
+        llm = ChatOllama(
+            model="llama3.1:8b",
+            temperature=0.0,
+            verbose=True,
+            cache=llm_cache(),
+            callbacks=telemetry_callbacks(),
+        )
+
+    return prompt, llm
+
+
+def build_summary_chain(
+    structured_output: bool = True,
+) -> Runnable[dict[str, Any], Summary]:
+    """
+    Build the summarization chain.
+    """
+    prompt, llm = summary_prompt_and_llm(structured_output=structured_output)
+    return prompt | llm | summary_output_parser
+
+
+def summarize_profile(linkedin_profile: str, structured_output: bool = True) -> Summary:
+    """
+    Summarize a rendered LinkedIn profile with the LLM.
+    """
+    chain = build_summary_chain(structured_output=structured_output)
+
+    response: Summary = chain.invoke(
+        input={"linkedin_profile": linkedin_profile},
+        config={"callbacks": telemetry_callbacks()},
+    )
+
+    return response
+
+
 def chain(
     full_name: str,
     company_name: str,
     job_title: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    structured_output: bool = True,
 ) -> tuple[Summary, str]:
     """
     This is a simple example of how to use the LangChain library to create a chain of prompts and a model.
     This chain uses the Ollama model to generate a response to the user's question.
     """
 
-    linkedin_profile_url = linkedin_lookup_agent(
+    linkedin_profile_url = lookup_linkedin_profile_url(
         full_name=full_name,
         company_name=company_name,
         job_title=job_title,
@@ -50,18 +164,15 @@ def chain(
     if not linkedin_profile:
         raise ValueError("No LinkedIn profile found")
 
-    prompt = PromptTemplate(
-        input_variables=["linkedin_profile"],
-        template=summary_template,
-        partial_variables={
-            "format_instructions": summary_output_parser.get_format_instructions()
-        },
-    )
-
-    llm = ChatOllama(model="llama3.1:8b", temperature=0.0, verbose=True)
+    compact = compact_profile(linkedin_profile, token_budget=token_budget)
 
-    chain = prompt | llm | summary_output_parser
+    logger.info(
+        "Profile compacted from %d to %d tokens (saved %d)",
+        compact.original_tokens,
+        compact.tokens,
+        compact.saved_tokens,
+    )
 
-    response: Summary = chain.invoke(input={"linkedin_profile": linkedin_profile})
+    response = summarize_profile(compact.text, structured_output=structured_output)
 
     return response, linkedin_profile.get("photoUrl", "")
@@ -0,0 +1,253 @@
+"""
+Token-budgeted compaction of LinkedIn profiles before summarization.
+
+The profile is rendered as compact `key: value` lines instead of a Python dict repr,
+with sections ordered by how much they matter for the summary. When the result is
+over the token budget, the least important sections are degraded first (older
+positions are summarized into one line, long texts and lists are truncated, and
+interests are dropped), while the most recent positions are kept in full.
+
+Usage:
+    python -m src.chapter_2.compaction --budget 800 [--llm]
+"""
+
+import argparse
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from src.common.tokens import estimate_tokens
+
+DEFAULT_TOKEN_BUDGET = 1000
+
+
+@dataclass
+class CompactProfile:
+    """A compacted profile and its token accounting."""
+
+    text: str
+    tokens: int
+    original_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+def truncate(text: str, limit: int) -> str:
+    """Collapse whitespace and cut a text to `limit` characters on a word boundary."""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+def format_date(date: dict[str, Any] | None) -> str:
+    if not date:
+        return "present"
+    if date.get("month"):
+        return f"{date.get('year', '?')}-{date['month']:02d}"
+    return str(date.get("year", "?"))
+
+
+def format_period(start_end_date: dict[str, Any] | None) -> str:
+    start_end_date = start_end_date or {}
+    return (
+        f"{format_date(start_end_date.get('start'))} to "
+        f"{format_date(start_end_date.get('end'))}"
+    )
+
+
+def sorted_positions(profile: dict[str, Any]) -> list[dict[str, Any]]:
+    """Positions sorted from the most recent start date to the oldest."""
+    positions: list[dict[str, Any]] = profile.get("positions", {}).get(
+        "positionHistory", []
+    )
+
+    def start(position: dict[str, Any]) -> tuple[int, int]:
+        date = (position.get("startEndDate") or {}).get("start") or {}
+        return date.get("year", 0), date.get("month", 0)
+
+    return sorted(positions, key=start, reverse=True)
+
+
+def render_header(profile: dict[str, Any], level: int) -> str:
+    lines = [f"name: {profile.get('firstName', '')} {profile.get('lastName', '')}"]
+    for key in ("headline", "location"):
+        if profile.get(key):
+            lines.append(f"{key}: {profile[key]}")
+    if profile.get("summary"):
+        lines.append(f"about: {truncate(profile['summary'], (600, 300, 150)[level])}")
+    return "\n".join(lines)
+
+
+def render_positions(profile: dict[str, Any], level: int) -> str:
+    # (positions kept in full, description characters, one-line positions kept)
+    full_count, description_limit, max_positions = (
+        (3, 900, 20),
+        (2, 450, 20),
+        (1, 300, 10),
+        (1, 150, 5),
+    )[level]
+
+    lines = ["positions:"]
+    for index, position in enumerate(sorted_positions(profile)[:max_positions]):
+        line = (
+            f"- {position.get('title', '')} @ {position.get('companyName', '')} "
+            f"({format_period(position.get('startEndDate'))})"
+        )
+        description = position.get("description", "")
+        if index < full_count and description:
+            line += f": {truncate(description, description_limit)}"
+        elif description:
+            first_sentence = re.split(r"[.!?]\s|\n", description.strip(" •"))[0]
+            line += f": {truncate(first_sentence, 80)}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def render_education(profile: dict[str, Any], level: int) -> str:
+    educations = profile.get("schools", {}).get("educationHistory", [])
+    if not educations:
+        return ""
+
+    lines = ["education:"]
+    for education in educations:
+        degree = ", ".join(
+            value
+            for value in (education.get("degreeName"), education.get("fieldOfStudy"))
+            if value
+        )
+        line = f"- {degree} @ {education.get('schoolName', '')}"
+        if level == 0:
+            line += f" ({format_period(education.get('startEndDate'))})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def render_skills(profile: dict[str, Any], level: int) -> str:
+    skills: list[str] = profile.get("skills", [])
+    languages: list[str] = profile.get("languages", [])
+    limit = (30, 15, 8)[level]
+
+    lines = []
+    if skills:
+        lines.append(f"skills: {', '.join(skills[:limit])}")
+    if languages:
+        lines.append(f"languages: {', '.join(languages)}")
+    return "\n".join(lines)
+
+
+def render_recommendations(profile: dict[str, Any], level: int) -> str:
+    recommendations = profile.get("recommendations", {}).get(
+        "recommendationHistory", []
+    )
+    count, limit = ((3, 400), (2, 200), (1, 120), (0, 0))[level]
+    if not recommendations or count == 0:
+        return ""
+
+    lines = ["recommendations:"]
+    for recommendation in recommendations[:count]:
+        lines.append(
+            f"- {recommendation.get('caption', '')}: "
+            f"{truncate(recommendation.get('description', ''), limit)}"
+        )
+    return "\n".join(lines)
+
+
+def render_interests(profile: dict[str, Any], level: int) -> str:
+    if level > 0:
+        return ""
+
+    interests = profile.get("interests", {})
+    names = [
+        f"{voice.get('firstName', '')} {voice.get('lastName', '')}"
+        for voice in interests.get("topVoices", [])
+    ] + [company.get("name", "") for company in interests.get("companies", [])]
+    return f"follows: {', '.join(names[:8])}" if names else ""
+
+
+# Sections in output order, each with the number of detail levels it supports.
+SECTIONS: list[tuple[Callable[[dict[str, Any], int], str], int]] = [
+    (render_header, 3),
+    (render_positions, 4),
+    (render_education, 2),
+    (render_skills, 3),
+    (render_recommendations, 4),
+    (render_interests, 2),
+]
+
+# Order in which sections are degraded when the profile is over budget.
+DEGRADE_ORDER = [5, 4, 3, 2, 4, 0, 1, 3, 4, 1, 0, 1]
+
+
+def compact_profile(
+    profile: dict[str, Any], token_budget: int = DEFAULT_TOKEN_BUDGET
+) -> CompactProfile:
+    """
+    Render a profile as compact text that fits `token_budget` when possible.
+    """
+    levels = [0] * len(SECTIONS)
+
+    def render() -> str:
+        parts = (
+            render_section(profile, level)
+            for (render_section, _), level in zip(SECTIONS, levels, strict=True)
+        )
+        return "\n".join(part for part in parts if part)
+
+    text = render()
+    for section in DEGRADE_ORDER:
+        if estimate_tokens(text) <= token_budget:
+            break
+        if levels[section] < SECTIONS[section][1] - 1:
+            levels[section] += 1
+            text = render()
+
+    return CompactProfile(
+        text=text,
+        tokens=estimate_tokens(text),
+        original_tokens=estimate_tokens(str(profile)),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark profile compaction.")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    parser.add_argument(
+        "--llm", action="store_true", help="Also time the summarization LLM call"
+    )
+    args = parser.parse_args()
+
+    from src.chapter_2.chain import summarize_profile
+    from src.chapter_2.linkedin.api import get_linkedin_profile
+
+    profile = get_linkedin_profile(linkedin_profile_url="", mock=True)
+
+    started = time.perf_counter()
+    compact = compact_profile(profile, token_budget=args.budget)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(compact.text, "\n")
+    print(f"Original prompt profile: {compact.original_tokens} tokens (dict repr)")
+    print(f"Compacted profile:       {compact.tokens} tokens (budget {args.budget})")
+    print(
+        f"Saved:                   {compact.saved_tokens} tokens "
+        f"({compact.saved_tokens / compact.original_tokens:.0%}) "
+        f"in {elapsed_ms:.2f}ms"
+    )
+
+    if args.llm:
+        for label, linkedin_profile in (
+            ("original", str(profile)),
+            ("compacted", compact.text),
+        ):
+            started = time.perf_counter()
+            summarize_profile(linkedin_profile)
+            print(f"Summarization ({label}): {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
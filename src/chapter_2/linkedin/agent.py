@@ -5,6 +5,8 @@ from langchain_core.tools import Tool
 from langchain_ollama import ChatOllama
 
 from src.chapter_2.linkedin.api import search_linkedin_profile
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
 
 FORMAT_INSTRUCTIONS = """
 Please follow these formatting instructions carefully:
@@ -46,7 +48,12 @@ template = FORMAT_INSTRUCTIONS + COMMAND
 
 def linkedin_lookup_agent(full_name: str, company_name: str, job_title: str) -> str:
     """Lookup a LinkedIn profile URL given a person description."""
-    llm = ChatOllama(model="llama3.2:3b", temperature=0.0)
+    llm = ChatOllama(
+        model="llama3.2:3b",
+        temperature=0.0,
+        cache=llm_cache(),
+        callbacks=telemetry_callbacks(),
+    )
 
     tools = [
         Tool(
@@ -74,7 +81,8 @@ def linkedin_lookup_agent(full_name: str, company_name: str, job_title: str) ->
                 company_name=company_name,
                 job_title=job_title,
             )
-        }
+        },
+        config={"callbacks": telemetry_callbacks()},
     )
 
     linkedin_url: str = result.get("output", "")
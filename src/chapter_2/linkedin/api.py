@@ -1,10 +1,13 @@
+import functools
 import json
 import os
+from collections.abc import Iterable
 from typing import Any
 
-import requests
 from langchain_community.tools.tavily_search import TavilySearchResults
 
+from src.chapter_2.linkedin.fetcher import profile_fetcher
+
 
 def minimal_profile(data: dict[str, Any]) -> dict[str, Any]:
     """Remove empty values and specific fields from a dictionary."""
@@ -16,8 +19,9 @@ def minimal_profile(data: dict[str, Any]) -> dict[str, Any]:
     }
 
 
+@functools.cache
 def mocked_linkedin_profile() -> dict[str, Any]:
-    """Get Robert Molina's LinkedIn profile from local JSON file."""
+    """Get Robert Molina's LinkedIn profile from local JSON file (parsed once)."""
     current_dir = os.path.dirname(os.path.abspath(__file__))
     json_path = os.path.join(current_dir, "./mocks/robert_molina_linkedin.json")
 
@@ -34,14 +38,21 @@ def get_linkedin_profile(
     if mock:
         return minimal_profile(mocked_linkedin_profile())
 
-    api_endpoint = "https://api.scrapin.io/enrichment/profile"
-    params = {
-        "apikey": os.environ.get("SCRAPING_IO_API_KEY"),
-        "linkedInUrl": linkedin_profile_url,
-    }
-    response = requests.get(api_endpoint, params=params)
-    data: dict[str, Any] = response.json().get("person", {})
-    return minimal_profile(data)
+    return minimal_profile(profile_fetcher().fetch(linkedin_profile_url))
+
+
+def get_linkedin_profiles(
+    linkedin_profile_urls: Iterable[str], mock: bool = True
+) -> dict[str, dict[str, Any]]:
+    """Get several LinkedIn profiles concurrently, keyed by profile URL."""
+    if mock:
+        return {
+            url: minimal_profile(mocked_linkedin_profile())
+            for url in linkedin_profile_urls
+        }
+
+    profiles = profile_fetcher().fetch_many(linkedin_profile_urls)
+    return {url: minimal_profile(profile) for url, profile in profiles.items()}
 
 
 def search_linkedin_profile(search_query: str) -> Any:
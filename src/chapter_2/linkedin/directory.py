@@ -0,0 +1,247 @@
+"""
+Local directory of known LinkedIn profiles.
+
+A SQLite FTS5 index of (full name, companies, job titles) -> profile URL, built from
+scrapin-style profile dumps such as `mocks/*.json`. The chain consults it before
+running the lookup agent and writes newly resolved URLs back to it.
+
+Usage:
+    python -m src.chapter_2.linkedin.directory build [dumps...]
+    python -m src.chapter_2.linkedin.directory lookup "Robert Molina" PayPal "Engineer"
+"""
+
+import argparse
+import functools
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from difflib import SequenceMatcher
+from typing import Any
+
+DEFAULT_PATH = ".linkedin_directory.sqlite"
+MOCKS_GLOB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mocks/*.json")
+
+# Name tokens that must be shared for a name to match on containment, so that a
+# first name alone does not fully match a full name.
+NAME_MIN_OVERLAP = 2
+# Weights of the name, company and job title similarities in a match score.
+NAME_WEIGHT = 0.6
+COMPANY_WEIGHT = 0.25
+TITLE_WEIGHT = 0.15
+
+# Shortest name token looked for in a profile URL slug, so that initials and
+# short particles do not match by chance.
+MIN_SLUG_TOKEN_LENGTH = 3
+PROFILE_URL = re.compile(r"https?://(?:[a-z]{2,3}\.)?linkedin\.com/in/([\w%-]+)/?")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens of a string."""
+    return re.findall(r"\w+", text.lower())
+
+
+def similarity(query: str, candidates: Iterable[str], min_overlap: int = 1) -> float:
+    """
+    Best fuzzy similarity between a query and any of the candidates.
+
+    Combines the edit-based ratio with token containment, so that "Software
+    Engineer" fully matches "Staff Software Engineer, MTS 1". Containment only
+    counts when at least `min_overlap` tokens are shared, otherwise the edit ratio
+    alone decides.
+    """
+    query_tokens = tokenize(query)
+    if not query_tokens:
+        return 0.0
+
+    best = 0.0
+    for candidate in candidates:
+        candidate_tokens = tokenize(candidate)
+        if not candidate_tokens:
+            continue
+        ratio = SequenceMatcher(
+            None, " ".join(query_tokens), " ".join(candidate_tokens)
+        ).ratio()
+        overlap = len(set(query_tokens) & set(candidate_tokens))
+        containment = (
+            overlap / len(set(query_tokens)) if overlap >= min_overlap else 0.0
+        )
+        best = max(best, ratio, containment)
+    return best
+
+
+def is_profile_url(url: str, full_name: str) -> bool:
+    """
+    Whether `url` is a bare LinkedIn profile URL whose slug contains part of the
+    name, as checked before remembering a URL resolved by the agent. Name tokens
+    are looked for inside the slug, which is often concatenated ("rmolinamir").
+    """
+    match = PROFILE_URL.fullmatch(url)
+    if match is None:
+        return False
+    slug = "".join(tokenize(match.group(1)))
+    return any(
+        len(token) >= MIN_SLUG_TOKEN_LENGTH and token in slug
+        for token in tokenize(full_name)
+    )
+
+
+class ProfileDirectory:
+    """
+    SQLite FTS5 index of known profiles with fuzzy name/company/title lookups.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, min_score: float = 0.8) -> None:
+        self.path = path
+        self.min_score = min_score
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS profiles USING fts5(
+                full_name,
+                companies,
+                job_titles,
+                url UNINDEXED,
+                updated_at UNINDEXED
+            )
+            """
+        )
+        self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM profiles"
+            ).fetchone()
+        return int(count)
+
+    def add(
+        self,
+        url: str,
+        full_name: str,
+        companies: Iterable[str],
+        job_titles: Iterable[str],
+    ) -> None:
+        """
+        Add or replace the entry of a profile URL.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM profiles WHERE url = ?", (url,))
+            self._connection.execute(
+                "INSERT INTO profiles (full_name, companies, job_titles, url, "
+                "updated_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    full_name,
+                    "\n".join(dict.fromkeys(companies)),
+                    "\n".join(dict.fromkeys(job_titles)),
+                    url,
+                    time.time(),
+                ),
+            )
+            self._connection.commit()
+
+    def add_profile(self, profile: dict[str, Any]) -> None:
+        """
+        Add a scrapin `person` payload, indexing every company and title held.
+        """
+        positions = profile.get("positions", {}).get("positionHistory", [])
+        self.add(
+            url=profile["linkedInUrl"],
+            full_name=f"{profile.get('firstName', '')} {profile.get('lastName', '')}",
+            companies=[p["companyName"] for p in positions if p.get("companyName")],
+            job_titles=[profile.get("headline", "")]
+            + [p["title"] for p in positions if p.get("title")],
+        )
+
+    def build(self, dump_paths: Iterable[str]) -> int:
+        """
+        Index every profile dump in `dump_paths`, returning how many were added.
+        """
+        count = 0
+        for dump_path in dump_paths:
+            with open(dump_path) as f:
+                data: dict[str, Any] = json.load(f)
+            profile = data.get("person", data)
+            if profile.get("linkedInUrl"):
+                self.add_profile(profile)
+                count += 1
+        return count
+
+    def lookup(self, full_name: str, company_name: str, job_title: str) -> str | None:
+        """
+        Return the URL of the best fuzzy match, or None if no entry is close enough.
+        """
+        tokens = tokenize(full_name)
+        if not tokens:
+            return None
+
+        # Prefix-match any name token to collect candidates, then score them.
+        query = "full_name : ({})".format(" OR ".join(f'"{t}"*' for t in tokens))
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT full_name, companies, job_titles, url FROM profiles "
+                "WHERE profiles MATCH ? ORDER BY rank LIMIT 25",
+                (query,),
+            ).fetchall()
+
+        best_url, best_score = None, 0.0
+        for name, companies, job_titles, url in rows:
+            name_score = similarity(full_name, [name], min_overlap=NAME_MIN_OVERLAP)
+            if name_score < self.min_score:
+                continue
+
+            score = (
+                NAME_WEIGHT * name_score
+                + COMPANY_WEIGHT * similarity(company_name, companies.split("\n"))
+                + TITLE_WEIGHT * similarity(job_title, job_titles.split("\n"))
+            )
+            if score > best_score:
+                best_url, best_score = url, score
+
+        return best_url if best_score >= self.min_score else None
+
+
+@functools.cache
+def profile_directory() -> ProfileDirectory:
+    """
+    Return the process-wide profile directory, seeded from the bundled mocks.
+    """
+    directory = ProfileDirectory(os.getenv("LINKEDIN_DIRECTORY_PATH", DEFAULT_PATH))
+    if len(directory) == 0:
+        directory.build(sorted(glob.glob(MOCKS_GLOB)))
+    return directory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the local profile directory.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Index profile dumps")
+    build_parser.add_argument("dumps", nargs="*", help="Profile JSON files")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Look up a profile URL")
+    lookup_parser.add_argument("full_name")
+    lookup_parser.add_argument("company_name")
+    lookup_parser.add_argument("job_title")
+
+    args = parser.parse_args()
+    directory = profile_directory()
+
+    if args.command == "build":
+        count = directory.build(args.dumps or sorted(glob.glob(MOCKS_GLOB)))
+        print(f"Indexed {count} profiles ({len(directory)} in {directory.path})")
+    else:
+        started = time.perf_counter()
+        url = directory.lookup(args.full_name, args.company_name, args.job_title)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{url or 'No match'} ({elapsed_ms:.2f}ms)")
+
+
+if __name__ == "__main__":
+    main()
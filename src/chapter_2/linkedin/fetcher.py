@@ -0,0 +1,227 @@
+"""
+Cached, pooled LinkedIn profile fetcher for the scrapin enrichment API.
+
+Profiles are looked up in an in-memory TTL cache first, then in a disk cache, and
+only then fetched over a keep-alive session. Concurrent fetches of the same profile
+are coalesced into a single request and remote requests are rate limited.
+
+Settings:
+    SCRAPIN_API_ENDPOINT: Enrichment endpoint (point it at `stub_server.py` locally).
+    SCRAPING_IO_API_KEY: API key sent with every request.
+    LINKEDIN_CACHE_DIR: Directory of the disk cache (default `.linkedin_cache`).
+    LINKEDIN_CACHE_TTL_SECONDS: Time to live of a cached profile (default one day).
+    LINKEDIN_REQUESTS_PER_SECOND: Remote request rate limit (default 5).
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.common.singleflight import SingleFlight
+from src.common.ttl_cache import TTLCache
+
+DEFAULT_ENDPOINT = "https://api.scrapin.io/enrichment/profile"
+DEFAULT_CACHE_DIR = ".linkedin_cache"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+def normalize_profile_url(url: str) -> str:
+    """
+    Normalize a LinkedIn profile URL so that equivalent URLs share a cache entry.
+
+    Forces https and drops the query string, fragment, trailing slash and locale
+    subdomain, e.g. `http://es.linkedin.com/in/rmolinamir/?trk=x` becomes
+    `https://www.linkedin.com/in/rmolinamir`.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.endswith("linkedin.com"):
+        host = "www.linkedin.com"
+
+    path = parts.path.rstrip("/").lower()
+    return f"https://{host}{path}"
+
+
+class RateLimiter:
+    """
+    Space out calls so that at most `rate` calls per second are started.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self) -> None:
+        """
+        Block until the next call slot is available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ProfileFetcher:
+    """
+    Fetch LinkedIn profiles through a memory cache, a disk cache and a pooled session.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = DEFAULT_ENDPOINT,
+        api_key: str | None = None,
+        cache_dir: str | None = DEFAULT_CACHE_DIR,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        timeout: float = 30.0,
+        requests_per_second: float = 5.0,
+        max_workers: int = 8,
+    ) -> None:
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.remote_fetches = 0
+        self.disk_hits = 0
+
+        self.memory_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+            max_entries=1024, ttl_seconds=ttl_seconds
+        )
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.single_flight: SingleFlight[str, dict[str, Any]] = SingleFlight()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max_workers,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET",),
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch(self, linkedin_profile_url: str) -> dict[str, Any]:
+        """
+        Fetch the raw `person` payload of a profile, using the caches when possible.
+        """
+        key = normalize_profile_url(linkedin_profile_url)
+
+        profile = self.memory_cache.get(key)
+        if profile is not None:
+            return profile
+
+        return self.single_flight.do(key, lambda: self._load(key))
+
+    def fetch_many(self, linkedin_profile_urls: Iterable[str]) -> dict[str, Any]:
+        """
+        Fetch several profiles concurrently, keyed by the URLs as given.
+        """
+        urls = list(dict.fromkeys(linkedin_profile_urls))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            profiles = executor.map(self.fetch, urls)
+            return dict(zip(urls, profiles, strict=True))
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the cache and request counters of the fetcher.
+        """
+        return {
+            "memory": self.memory_cache.stats(),
+            "disk_hits": self.disk_hits,
+            "remote_fetches": self.remote_fetches,
+            "coalesced_fetches": self.single_flight.shared,
+        }
+
+    def _load(self, key: str) -> dict[str, Any]:
+        profile = self._read_disk(key)
+        if profile is None:
+            profile = self._fetch_remote(key)
+            self._write_disk(key, profile)
+        else:
+            self.disk_hits += 1
+
+        self.memory_cache.set(key, profile)
+        return profile
+
+    def _fetch_remote(self, key: str) -> dict[str, Any]:
+        self.rate_limiter.acquire()
+        self.remote_fetches += 1
+
+        response = self.session.get(
+            self.endpoint,
+            params={"apikey": self.api_key, "linkedInUrl": key},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        data: dict[str, Any] = response.json().get("person", {})
+        return data
+
+    def _disk_path(self, key: str) -> str | None:
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read_disk(self, key: str) -> dict[str, Any] | None:
+        path = self._disk_path(key)
+        if path is None or not os.path.exists(path):
+            return None
+
+        if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+            return None
+
+        with open(path) as f:
+            data: dict[str, Any] = json.load(f)
+        return data
+
+    def _write_disk(self, key: str, profile: dict[str, Any]) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+
+        # Write to a temporary file first so concurrent readers never see partial JSON.
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(profile, f)
+        os.replace(temporary_path, path)
+
+
+@functools.cache
+def profile_fetcher() -> ProfileFetcher:
+    """
+    Return the process-wide profile fetcher configured from the environment.
+    """
+    return ProfileFetcher(
+        endpoint=os.getenv("SCRAPIN_API_ENDPOINT", DEFAULT_ENDPOINT),
+        api_key=os.getenv("SCRAPING_IO_API_KEY"),
+        cache_dir=os.getenv("LINKEDIN_CACHE_DIR", DEFAULT_CACHE_DIR) or None,
+        ttl_seconds=float(os.getenv("LINKEDIN_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+        requests_per_second=float(os.getenv("LINKEDIN_REQUESTS_PER_SECOND", 5)),
+    )
@@ -0,0 +1,83 @@
+"""
+Local stand-in for the scrapin enrichment API.
+
+Serves the mocked LinkedIn profile for any `linkedInUrl`, with an optional latency,
+so that the profile fetcher can be exercised without the real API:
+
+    python -m src.chapter_2.linkedin.stub_server --port 8650 --latency 0.5
+    SCRAPIN_API_ENDPOINT=http://localhost:8650/enrichment/profile python -m ...
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from src.chapter_2.linkedin.api import mocked_linkedin_profile
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: "StubServer"
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        if parts.path != "/enrichment/profile" or "linkedInUrl" not in query:
+            self.send_error(404)
+            return
+
+        self.server.record_request(query["linkedInUrl"][0])
+        time.sleep(self.server.latency)
+
+        body = json.dumps(
+            {"success": True, "person": mocked_linkedin_profile()}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server that counts the requests made for each profile URL.
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/enrichment/profile"
+
+    def record_request(self, linkedin_profile_url: str) -> None:
+        with self._lock:
+            self.requests[linkedin_profile_url] = (
+                self.requests.get(linkedin_profile_url, 0) + 1
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the scrapin API stand-in.")
+    parser.add_argument("--port", type=int, default=8650)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    args = parser.parse_args()
+
+    server = StubServer(port=args.port, latency=args.latency)
+    print(f"Serving mocked profiles at {server.endpoint}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare format-instruction prompts with Ollama structured output for summaries.
+
+Every profile of the batch is compacted at several token budgets and summarized once
+per mode. The benchmark reports the average prompt size and latency of each mode
+and how many responses failed to parse into a `Summary`, each of which would cost a
+full re-parse retry (a new LLM call) in production.
+
+Usage:
+    python -m src.chapter_2.structured_benchmark [dumps...] --budgets 300 600 1000
+"""
+
+import argparse
+import glob
+import json
+import statistics
+import time
+from typing import Any
+
+from langchain_core.exceptions import OutputParserException
+
+from src.chapter_2.chain import summary_prompt_and_llm
+from src.chapter_2.compaction import compact_profile
+from src.chapter_2.linkedin.api import minimal_profile
+from src.chapter_2.linkedin.directory import MOCKS_GLOB
+from src.chapter_2.output_parsers import summary_output_parser
+from src.common.tokens import estimate_tokens
+
+
+def load_profiles(dump_paths: list[str]) -> list[dict[str, Any]]:
+    profiles = []
+    for dump_path in dump_paths:
+        with open(dump_path) as f:
+            data: dict[str, Any] = json.load(f)
+        profiles.append(minimal_profile(data.get("person", data)))
+    return profiles
+
+
+def run_mode(structured_output: bool, profiles: list[str]) -> dict[str, float]:
+    """
+    Summarize every rendered profile once and collect the prompt and parse stats.
+    """
+    prompt, llm = summary_prompt_and_llm(structured_output=structured_output)
+    prompt_tokens: list[int] = []
+    latencies: list[float] = []
+    failures = 0
+
+    for linkedin_profile in profiles:
+        rendered = prompt.format(linkedin_profile=linkedin_profile)
+        prompt_tokens.append(estimate_tokens(rendered))
+
+        started = time.perf_counter()
+        message = llm.invoke(rendered)
+        latencies.append(time.perf_counter() - started)
+
+        try:
+            summary_output_parser.parse(str(message.content))
+        except OutputParserException:
+            failures += 1
+
+    return {
+        "prompt_tokens": statistics.mean(prompt_tokens),
+        "latency": statistics.mean(latencies),
+        "retry_rate": failures / len(profiles),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark structured output.")
+    parser.add_argument("dumps", nargs="*", help="Profile JSON files")
+    parser.add_argument(
+        "--budgets", type=int, nargs="+", default=[300, 600, 1000, 2000]
+    )
+    args = parser.parse_args()
+
+    profiles = [
+        compact_profile(profile, token_budget=budget).text
+        for profile in load_profiles(args.dumps or sorted(glob.glob(MOCKS_GLOB)))
+        for budget in args.budgets
+    ]
+    print(f"Summarizing {len(profiles)} profiles per mode\n")
+
+    print(f"{'mode':<22}{'prompt tokens':>15}{'latency (s)':>13}{'retry rate':>12}")
+    for label, structured_output in (
+        ("format instructions", False),
+        ("structured output", True),
+    ):
+        stats = run_mode(structured_output, profiles)
+        print(
+            f"{label:<22}{stats['prompt_tokens']:>15.0f}"
+            f"{stats['latency']:>13.1f}{stats['retry_rate']:>12.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
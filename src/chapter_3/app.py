@@ -1,9 +1,75 @@
-from flask import Flask, Response, jsonify, render_template, request
+import json
+import os
+from collections.abc import Iterator
+from typing import Any
+
+from flask import Flask, Response, jsonify, render_template, request, url_for
 
 from src.chapter_2.chain import chain
+from src.chapter_3.jobs import DONE, JobQueue
+from src.common.singleflight import SingleFlight
+from src.common.ttl_cache import TTLCache
 
 app = Flask(__name__)
 
+type SummaryKey = tuple[str, str, str]
+
+result_cache: TTLCache[SummaryKey, dict[str, Any]] = TTLCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 1024)),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", 60 * 60)),
+)
+in_flight: SingleFlight[SummaryKey, dict[str, Any]] = SingleFlight()
+
+
+def summarize(name: str, company: str, job_title: str) -> dict[str, Any]:
+    """
+    Run the chapter 2 chain and build the JSON payload returned to the client.
+    """
+    summary, photo_url = chain(name, company, job_title)
+    return {
+        "summary": summary.summary,
+        "interesting_facts": summary.interesting_facts,
+        "recent_work_experience": summary.recent_work_experience,
+        "estimated_earnings": summary.estimated_earnings,
+        "upskilling": summary.upskilling,
+        "picture_url": photo_url,
+    }
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def cached_summarize(name: str, company: str, job_title: str) -> dict[str, Any]:
+    """
+    Summarize through the result cache, coalescing concurrent identical requests
+    so that only one `chain()` call runs per (name, company, job title).
+    """
+    key = (normalize(name), normalize(company), normalize(job_title))
+
+    payload = result_cache.get(key)
+    if payload is not None:
+        return payload
+
+    def compute() -> dict[str, Any]:
+        # An identical request may have completed since the check above, which
+        # already counted the lookup.
+        payload = result_cache.get(key, record=False)
+        if payload is not None:
+            return payload
+        payload = summarize(name, company, job_title)
+        result_cache.set(key, payload)
+        return payload
+
+    return in_flight.do(key, compute)
+
+
+job_queue = JobQueue(
+    handler=cached_summarize,
+    max_workers=int(os.getenv("JOB_WORKERS", 4)),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", 64)),
+)
+
 
 @app.route("/")
 def index() -> str:
@@ -15,18 +81,83 @@ def process() -> Response:
     name = request.form["name"]
     company = request.form["company"]
     job_title = request.form["job_title"]
-    summary, photo_url = chain(name, company, job_title)
+    return jsonify(cached_summarize(name, company, job_title))
+
+
+@app.route("/metrics")
+def metrics() -> Response:
+    """
+    Expose the result cache, request coalescing and job queue statistics.
+    """
     return jsonify(
         {
-            "summary": summary.summary,
-            "interesting_facts": summary.interesting_facts,
-            "recent_work_experience": summary.recent_work_experience,
-            "estimated_earnings": summary.estimated_earnings,
-            "upskilling": summary.upskilling,
-            "picture_url": photo_url,
+            "result_cache": result_cache.stats(),
+            "coalescing": {
+                "calls": in_flight.calls,
+                "coalesced": in_flight.shared,
+                "in_flight": in_flight.in_flight(),
+            },
+            "jobs": job_queue.stats(),
         }
     )
 
 
+@app.route("/jobs", methods=["POST"])
+def submit_job() -> tuple[Response, int]:
+    """
+    Queue a summary and return its job id right away.
+    """
+    job = job_queue.submit(
+        name=request.form["name"],
+        company=request.form["company"],
+        job_title=request.form["job_title"],
+    )
+    if job is None:
+        response = jsonify({"error": "Too many pending jobs, retry later"})
+        response.headers["Retry-After"] = "5"
+        return response, 429
+
+    return jsonify(
+        {
+            **job.to_dict(),
+            "status_url": url_for("job_status", job_id=job.id),
+            "events_url": url_for("job_events", job_id=job.id),
+        }
+    ), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id: str) -> tuple[Response, int]:
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id: str) -> tuple[Response, int]:
+    """
+    Stream the job status as Server-Sent Events until it finishes.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    def events() -> Iterator[str]:
+        yield f"event: status\ndata: {json.dumps({'status': job.status})}\n\n"
+        # Heartbeats keep proxies from closing the connection while the job runs.
+        while not job.finished.wait(timeout=15):
+            yield f"event: status\ndata: {json.dumps({'status': job.status})}\n\n"
+        # Not `error`, which EventSource uses for connection errors.
+        event = "result" if job.status == DONE else "failed"
+        yield f"event: {event}\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    ), 200
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8647, debug=True)
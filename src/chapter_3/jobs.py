@@ -0,0 +1,113 @@
+"""
+Background job queue for long-running summaries.
+
+Jobs are processed by a fixed-size worker pool. Submissions are rejected once
+`max_pending` jobs are queued or running, so the web tier can answer with a 429
+instead of piling up work it cannot finish in time.
+"""
+
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """State of a submitted job."""
+
+    id: str
+    status: str = QUEUED
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    finished: threading.Event = field(default_factory=threading.Event)
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {"job_id": self.id, "status": self.status}
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class JobQueue:
+    """
+    Run jobs on a worker pool with a limit on the number of pending jobs.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[..., dict[str, Any]],
+        max_workers: int = 4,
+        max_pending: int = 64,
+        retention_seconds: float = 60 * 60,
+    ) -> None:
+        self.handler = handler
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job-worker"
+        )
+
+    def submit(self, **kwargs: Any) -> Job | None:
+        """
+        Queue a job, or return None if the queue is full.
+        """
+        with self._lock:
+            self._prune()
+            if self._pending >= self.max_pending:
+                return None
+            job = Job(id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._pending += 1
+
+        self._executor.submit(self._run, job, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"pending": self._pending, "max_pending": self.max_pending}
+
+    def _run(self, job: Job, kwargs: dict[str, Any]) -> None:
+        job.status = RUNNING
+        try:
+            job.result = self.handler(**kwargs)
+            job.status = DONE
+        except Exception as error:
+            job.error = str(error)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+            job.finished.set()
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,128 @@
+"""
+Incremental ReAct loop that reuses the Ollama prompt cache between steps.
+
+The loop in `main.py` re-renders the whole prompt through the chat template on every
+iteration, so the text sent to the model is not guaranteed to extend the previous
+one and Ollama may re-process the entire prefix each time. Here the prompt is
+rendered once and sent raw, and each step sends the previous text unchanged with
+the model's answer and the new `Observation: ... Thought:` appended. Ollama keeps the
+evaluated tokens of the last request of a loaded model and evaluates only the new
+suffix, so the prompt eval cost of a step does not grow with the scratchpad. The
+loop reports the prompt-eval and generation time of every step.
+
+The `context` of a raw request is neither returned nor accepted by Ollama, so the
+whole text has to be sent with every step.
+"""
+
+import os
+from dataclasses import dataclass
+
+from langchain.agents.output_parsers.react_single_input import (
+    ReActSingleInputOutputParser,
+)
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import BaseTool, render_text_description
+from ollama import Client
+
+from src.chapter_4.main import template
+from src.chapter_4.tools import get_text_length
+from src.common.tool_executor import ToolExecutor
+
+NANOSECONDS_PER_MILLISECOND = 1_000_000
+
+
+@dataclass
+class StepTiming:
+    """Prompt evaluation and generation stats of a single agent step."""
+
+    step: int
+    prompt_tokens: int
+    prompt_eval_ms: float
+    generated_tokens: int
+    generation_ms: float
+
+
+def print_timings(timings: list[StepTiming]) -> None:
+    print(
+        f"\n{'step':>4} {'prompt tokens':>14} {'prompt eval (ms)':>17} "
+        f"{'generated tokens':>17} {'generation (ms)':>16}"
+    )
+    for timing in timings:
+        print(
+            f"{timing.step:>4} {timing.prompt_tokens:>14} "
+            f"{timing.prompt_eval_ms:>17.1f} {timing.generated_tokens:>17} "
+            f"{timing.generation_ms:>16.1f}"
+        )
+
+
+def incremental_agent(
+    question: str,
+    tools: list[BaseTool],
+    model: str = "llama3.1:8b",
+    agent_loop_limit: int = 20,
+) -> tuple[AgentFinish | None, list[StepTiming]]:
+    """
+    Run the ReAct loop, only appending to the prompt so Ollama reuses its cache.
+    """
+    client = Client(host=os.getenv("OLLAMA_HOST"))
+    parser = ReActSingleInputOutputParser()
+    executor = ToolExecutor(tools)
+
+    prompt = PromptTemplate.from_template(template=template).partial(
+        tools=render_text_description(tools),
+        tool_names=", ".join([t.name for t in tools]),
+    )
+
+    # Only ever appended to, so that every step extends the prompt of the previous.
+    transcript = prompt.format(input=question, agent_scratchpad="").rstrip("\n")
+    timings: list[StepTiming] = []
+
+    for step in range(1, agent_loop_limit + 1):
+        response = client.generate(
+            model=model,
+            prompt=transcript,
+            raw=True,
+            options={"temperature": 0.0, "stop": ["\nObservation"]},
+            keep_alive="10m",
+        )
+        transcript += response.response or ""
+
+        timings.append(
+            StepTiming(
+                step=step,
+                prompt_tokens=response.prompt_eval_count or 0,
+                prompt_eval_ms=(response.prompt_eval_duration or 0)
+                / NANOSECONDS_PER_MILLISECOND,
+                generated_tokens=response.eval_count or 0,
+                generation_ms=(response.eval_duration or 0)
+                / NANOSECONDS_PER_MILLISECOND,
+            )
+        )
+
+        agent_step = parser.parse(response.response or "")
+
+        if isinstance(agent_step, AgentFinish):
+            return agent_step, timings
+
+        if isinstance(agent_step, AgentAction):
+            observation = executor.invoke(agent_step.tool, str(agent_step.tool_input))
+            transcript += f"\nObservation: {observation}\nThought: "
+
+    print(f"Agent loop limit of {agent_loop_limit} reached.")
+    return None, timings
+
+
+def main() -> None:
+    """Run the incremental agent and report the per-step timings."""
+    finish, timings = incremental_agent(
+        question="What is the length of the string: Hello, world!",
+        tools=[get_text_length],
+    )
+    if finish is not None:
+        print(finish.return_values)
+    print_timings(timings)
+
+
+if __name__ == "__main__":
+    main()
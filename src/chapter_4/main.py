@@ -4,15 +4,16 @@ from langchain.agents.format_scratchpad.log import format_log_to_str
 from langchain.agents.output_parsers.react_single_input import (
     ReActSingleInputOutputParser,
 )
-from langchain.tools import BaseTool
 from langchain_core.agents import AgentAction, AgentFinish
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import Runnable
 from langchain_core.tools import render_text_description
 from langchain_ollama import ChatOllama
 
-from src.chapter_4.callbacks import AgentCallbackHandler
 from src.chapter_4.tools import get_text_length
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+from src.common.tool_executor import ToolExecutor
 
 template = """
 Answer the following questions as best you can. You have access to the following tools:
@@ -41,14 +42,10 @@ Thought: {agent_scratchpad}
 """
 
 
-def find_tool(tools: list[BaseTool], tool_name: str) -> BaseTool:
-    """Find a tool by name."""
-    return next(filter(lambda t: t.name == tool_name, tools))
-
-
 def main() -> None:
     """Main function."""
     tools = [get_text_length]
+    executor = ToolExecutor(tools, default_timeout=30)
 
     prompt = PromptTemplate.from_template(template=template).partial(
         tools=render_text_description(tools),
@@ -60,7 +57,8 @@ def main() -> None:
         temperature=0.0,
         verbose=True,
         stop=["\nObservation"],
-        callbacks=[AgentCallbackHandler()],
+        cache=llm_cache(),
+        callbacks=telemetry_callbacks(),
     )
 
     intermediate_steps: list[tuple[AgentAction, str]] = []
@@ -86,14 +84,16 @@ def main() -> None:
                 "input": "What is the length of the string: Hello, world!",
                 "agent_scratchpad": intermediate_steps,
             },
+            config={"callbacks": telemetry_callbacks()},
         )
         agent_step_count += 1
 
         if isinstance(agent_step, AgentAction):
-            tool_name = agent_step.tool
-            tool_input = agent_step.tool_input
-            tool = find_tool(tools=tools, tool_name=tool_name)
-            observation = tool.invoke(str(tool_input))
+            observation = executor.invoke(
+                agent_step.tool,
+                str(agent_step.tool_input),
+                config={"callbacks": telemetry_callbacks()},
+            )
             intermediate_steps.append((agent_step, observation))
         elif isinstance(agent_step, AgentFinish):
             print(agent_step.return_values)
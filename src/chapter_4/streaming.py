@@ -0,0 +1,200 @@
+"""
+Streaming early-stop parsing for the ReAct agent.
+
+`main.py` waits for the whole completion, up to the `"\\nObservation"` stop sequence,
+before `ReActSingleInputOutputParser` looks at it. Ollama holds back every newline
+until it knows whether the stop sequence follows, so the end of the `Action Input:`
+line only shows once the generation is over. Here the completion is streamed without
+the stop sequence and parsed as the tokens arrive: as soon as the `Action Input:`
+line ends, the stream is closed, which cancels the generation, and the tool is
+dispatched right away. A final answer may span several lines and paragraphs, so it
+is only cut short when the model starts a new `Question:`, `Thought:` or
+`Observation:` block.
+
+Usage:
+    python -m src.chapter_4.streaming [--runs 3]
+"""
+
+import argparse
+import re
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from langchain.agents.format_scratchpad.log import format_log_to_str
+from langchain.agents.output_parsers.react_single_input import (
+    FINAL_ANSWER_ACTION,
+    ReActSingleInputOutputParser,
+)
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.messages import BaseMessageChunk
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool, render_text_description
+from langchain_ollama import ChatOllama
+
+from src.chapter_4.main import template
+from src.chapter_4.tools import get_text_length
+from src.common.telemetry import telemetry_callbacks
+from src.common.tool_executor import ToolExecutor
+
+COMPLETE_ACTION = re.compile(
+    r"Action\s*\d*\s*:.*?Action\s*\d*\s*Input\s*\d*\s*:[^\n]*\S[^\n]*\n", re.DOTALL
+)
+# A final answer is complete once the model starts a new block after it.
+END_OF_FINAL_ANSWER = re.compile(r"\n(?:Question|Thought|Observation)\s*:")
+
+
+class StreamingActionParser:
+    """
+    Incrementally parse a ReAct completion, one chunk at a time.
+
+    `feed` returns the agent step as soon as the text seen so far holds a complete
+    action or final answer, and None while more text is needed.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.parser = ReActSingleInputOutputParser()
+
+    def feed(self, chunk: str) -> AgentAction | AgentFinish | None:
+        self.text += chunk
+
+        action = COMPLETE_ACTION.search(self.text)
+        if action:
+            return self.parser.parse(self.text[: action.end()].rstrip("\n"))
+
+        answer_start = self.text.find(FINAL_ANSWER_ACTION)
+        if answer_start != -1:
+            end = END_OF_FINAL_ANSWER.search(
+                self.text, answer_start + len(FINAL_ANSWER_ACTION)
+            )
+            if end:
+                return self.parser.parse(self.text[: end.start()])
+        return None
+
+    def finish(self) -> AgentAction | AgentFinish:
+        """Parse whatever was received once the stream has ended."""
+        return self.parser.parse(self.text)
+
+
+@dataclass
+class StepResult:
+    """An agent step and how long it took to become available."""
+
+    step: AgentAction | AgentFinish
+    seconds: float
+    early_stopped: bool
+
+
+def stream_agent_step(agent: Runnable[Any, Any], inputs: dict[str, Any]) -> StepResult:
+    """
+    Stream one completion and return as soon as an action or final answer is parsed.
+    """
+    started = time.perf_counter()
+    parser = StreamingActionParser()
+    stream: Iterator[BaseMessageChunk] = agent.stream(
+        inputs, config={"callbacks": telemetry_callbacks()}
+    )
+    try:
+        for chunk in stream:
+            step = parser.feed(str(chunk.content))
+            if step is not None:
+                return StepResult(step, time.perf_counter() - started, True)
+    finally:
+        # Closing the generator closes the HTTP stream and stops the generation.
+        getattr(stream, "close", lambda: None)()
+    return StepResult(parser.finish(), time.perf_counter() - started, False)
+
+
+def blocking_agent_step(
+    agent: Runnable[Any, Any], inputs: dict[str, Any]
+) -> StepResult:
+    """Wait for the full completion before parsing it, like `main.py` does."""
+    started = time.perf_counter()
+    message = agent.invoke(inputs, config={"callbacks": telemetry_callbacks()})
+    step = ReActSingleInputOutputParser().parse(str(message.content))
+    return StepResult(step, time.perf_counter() - started, False)
+
+
+def build_agent(tools: list[BaseTool], stop: bool = True) -> Runnable[Any, Any]:
+    """
+    The ReAct prompt and LLM. Without the `Observation` stop sequence, the end of
+    the `Action Input:` line is streamed as soon as it is generated.
+    """
+    prompt = PromptTemplate.from_template(template=template).partial(
+        tools=render_text_description(tools),
+        tool_names=", ".join([t.name for t in tools]),
+    )
+    # The LLM cache is disabled so that both modes actually hit the model.
+    llm = ChatOllama(
+        model="llama3.1:8b",
+        temperature=0.0,
+        stop=["\nObservation"] if stop else None,
+        cache=False,
+    )
+    agent: Runnable[Any, Any] = (
+        {
+            "input": lambda x: x["input"],
+            "agent_scratchpad": lambda x: format_log_to_str(x["agent_scratchpad"]),
+        }
+        | prompt
+        | llm
+    )
+    return agent
+
+
+def streaming_agent(
+    question: str, tools: list[BaseTool], agent_loop_limit: int = 20
+) -> AgentFinish | None:
+    """Run the ReAct loop, dispatching each tool as soon as its call is parsed."""
+    agent = build_agent(tools, stop=False)
+    executor = ToolExecutor(tools)
+    intermediate_steps: list[tuple[AgentAction, str]] = []
+
+    for _ in range(agent_loop_limit):
+        result = stream_agent_step(
+            agent, {"input": question, "agent_scratchpad": intermediate_steps}
+        )
+        if isinstance(result.step, AgentFinish):
+            return result.step
+
+        observation = executor.invoke(result.step.tool, str(result.step.tool_input))
+        intermediate_steps.append((result.step, observation))
+
+    print(f"Agent loop limit of {agent_loop_limit} reached.")
+    return None
+
+
+def main() -> None:
+    """Compare the time to the first tool call of the blocking and streaming modes."""
+    parser = argparse.ArgumentParser(description="Benchmark time-to-tool-call.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--question", default="What is the length of the string: Hello, world!"
+    )
+    args = parser.parse_args()
+
+    tools = [get_text_length]
+    inputs = {"input": args.question, "agent_scratchpad": []}
+
+    for label, agent, agent_step in (
+        ("blocking", build_agent(tools), blocking_agent_step),
+        ("streaming", build_agent(tools, stop=False), stream_agent_step),
+    ):
+        timings = []
+        for _ in range(args.runs):
+            result = agent_step(agent, inputs)
+            timings.append(result.seconds)
+        print(
+            f"{label:>9}: {min(timings):.2f}s best, "
+            f"{sum(timings) / len(timings):.2f}s mean to "
+            f"{type(result.step).__name__} (early stop: {result.early_stopped})"
+        )
+
+    print(streaming_agent(args.question, tools))
+
+
+if __name__ == "__main__":
+    main()
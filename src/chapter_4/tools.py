@@ -1,6 +1,9 @@
 from langchain.tools import tool
 
+from src.common.tool_executor import pure
 
+
+@pure
 @tool
 def get_text_length(text: str) -> int:
     """Returns the length of the text."""
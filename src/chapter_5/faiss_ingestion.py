@@ -1,23 +1,43 @@
+import argparse
 import os
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import FAISS
-from langchain_ollama import OllamaEmbeddings
 from langchain_text_splitters import CharacterTextSplitter
 
+from src.chapter_5.parallel_pdf import iter_pdf_chunks
+from src.common.ann_index import add_index_arguments, index_spec_from_args
+from src.common.embedding_cache import cached_embeddings
+from src.common.faiss_storage import save_index
+from src.common.streaming_ingestion import ingest_documents, peak_rss_mb
+
+INDEX_PATH = "chapter_5_faiss_index"
+
 
 def main() -> None:
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    pdf_path = os.path.join(current_dir, "./files/project_2025.pdf")
-    loader = PyPDFLoader(file_path=pdf_path, mode="page")
+    parser = argparse.ArgumentParser(description="Ingest the PDF into FAISS.")
+    parser.add_argument(
+        "--pdf", default=os.path.join(current_dir, "./files/project_2025.pdf")
+    )
+    # Ingest each source into its own index to query them as shards.
+    parser.add_argument("--index", default=INDEX_PATH)
+    add_index_arguments(parser)
+    args = parser.parse_args()
     text_splitter = CharacterTextSplitter(
         chunk_size=1000, chunk_overlap=200, separator="\n"
     )
 
-    docs = text_splitter.split_documents(documents=loader.load())
-    embeddings = OllamaEmbeddings(model="nomic-embed-text")
+    embeddings = cached_embeddings(model="nomic-embed-text")
 
-    FAISS.from_documents(docs, embeddings).save_local("chapter_5_faiss_index")
+    # Chunks are embedded and added to the index in batches as they are loaded.
+    rss_before = peak_rss_mb()
+    ingest_documents(
+        iter_pdf_chunks(args.pdf, text_splitter=text_splitter),
+        embeddings,
+        checkpoint=lambda vectorstore: save_index(vectorstore, args.index),
+        index_spec=index_spec_from_args(args),
+    )
+    print(f"Peak RSS: {rss_before:.0f} MB before, {peak_rss_mb():.0f} MB after")
+    print("Embedding cache: ", embeddings.stats())
 
 
 if __name__ == "__main__":
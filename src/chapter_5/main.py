@@ -1,26 +1,38 @@
+import os
+
 from langchain import hub
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.chains.retrieval import create_retrieval_chain
-from langchain_community.vectorstores import FAISS
 from langchain_ollama import ChatOllama, OllamaEmbeddings
 
+from src.chapter_5.memory import ConversationMemory
+from src.chapter_5.sharded_retriever import ShardedRetriever
+from src.common.faiss_storage import load_index
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+
 
 def main() -> None:
     embeddings = OllamaEmbeddings(model="nomic-embed-text")
 
-    vectorstore = FAISS.load_local(
-        "chapter_5_faiss_index", embeddings, allow_dangerous_deserialization=True
+    # Comma-separated index directories, searched as shards of one corpus.
+    index_paths = os.getenv("CHAPTER_5_FAISS_INDEXES", "chapter_5_faiss_index")
+    retriever = ShardedRetriever(
+        shards=[load_index(path, embeddings) for path in index_paths.split(",")],
+        embeddings=embeddings,
+    )
+    llm = ChatOllama(
+        model="llama3.1:8b", cache=llm_cache(), callbacks=telemetry_callbacks()
     )
-    llm = ChatOllama(model="llama3.1:8b")
 
     retrieval_qa_chat_prompt = hub.pull("langchain-ai/retrieval-qa-chat")
     combine_docs_chain = create_stuff_documents_chain(llm, retrieval_qa_chat_prompt)
     retrieval_chain = create_retrieval_chain(
-        retriever=vectorstore.as_retriever(), combine_docs_chain=combine_docs_chain
+        retriever=retriever, combine_docs_chain=combine_docs_chain
     )
 
-    # Initialize conversation history
-    chat_history: list[dict[str, str]] = []
+    # Recent turns within the token budget, older ones summarized
+    memory = ConversationMemory(llm)
 
     while True:
         question = input("> Enter a question (or /bye to exit): ")
@@ -28,18 +40,26 @@ def main() -> None:
             break
 
         # Add the current question to chat history
-        chat_history.append({"role": "user", "content": question})
+        memory.add("user", question)
 
         # Include chat history in the chain's input
+        chat_history = memory.messages()
         response = retrieval_chain.invoke(
-            input={"input": question, "chat_history": chat_history}
+            input={"input": question, "chat_history": chat_history},
+            config={"callbacks": telemetry_callbacks()},
         )
 
         answer: str = response.get("answer")
         print("\n\n", answer.strip(), "\n\n")
+        print(
+            f"(chat history: {memory.tokens(chat_history)} tokens, "
+            f"{memory.saved_tokens} saved)\n"
+        )
 
         # Add the model's response to chat history
-        chat_history.append({"role": "assistant", "content": answer})
+        memory.add("assistant", answer)
+
+    memory.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+"""
+Token-budgeted conversation memory for the RAG chat loops.
+
+Sending the whole chat history with every question makes the prompt, and with it the
+latency, grow with the length of the session. `ConversationMemory` keeps a sliding
+window of the most recent turns within a token budget. Turns that fall out of the
+window are folded into a running summary by the LLM on a background thread, so the
+user does not wait for it, and the summary is sent ahead of the window. Until the
+summary has caught up, the most recent evicted turns are still sent verbatim in the
+part of the budget the summary leaves unused. When the summary cannot be updated,
+for example because Ollama is down, the error is logged and the update retried on the
+next eviction, and the history stays within the budget.
+
+Settings:
+    CHAT_HISTORY_TOKENS: Token budget of the chat history (default 1000).
+
+Usage:
+    memory = ConversationMemory(llm)
+    memory.add("user", question)
+    chain.invoke({"input": question, "chat_history": memory.messages()})
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from langchain_core.language_models import BaseChatModel
+
+from src.common.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 1000
+
+SUMMARY_PROMPT = """Update the summary of a conversation between a user and an \
+assistant with the new messages below. Keep the facts, names and questions that \
+later answers may depend on. Answer with the updated summary only, in at most \
+{words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+"""
+
+type Message = dict[str, str]
+
+
+def message_tokens(message: Message) -> int:
+    return estimate_tokens(f"{message['role']}: {message['content']}")
+
+
+class ConversationMemory:
+    """
+    Chat history made of a summary of the older turns and a window of the recent
+    ones, whose total stays within `max_tokens`. `summary_tokens` of the budget are
+    reserved for the summary.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        max_tokens: int | None = None,
+        summary_tokens: int | None = None,
+    ) -> None:
+        self.llm = llm
+        self.max_tokens = max_tokens or int(
+            os.getenv("CHAT_HISTORY_TOKENS") or DEFAULT_TOKEN_BUDGET
+        )
+        self.summary_tokens = summary_tokens or self.max_tokens // 4
+        self.summary = ""
+        self.window: list[Message] = []
+        # Tokens of the whole conversation, as the history would be sent unbounded.
+        self.full_tokens = 0
+        self.saved_tokens = 0
+
+        self._lock = threading.Lock()
+        # One worker, so that the summary updates are applied in order.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: Future[None] | None = None
+        # Messages evicted from the window that are not in the summary yet.
+        self._evicted: list[Message] = []
+
+    def add(self, role: str, content: str) -> None:
+        """Append a message, evicting the oldest ones from the window if needed."""
+        message = {"role": role, "content": content}
+        self.full_tokens += message_tokens(message)
+
+        with self._lock:
+            self.window.append(message)
+            window_budget = self.max_tokens - self.summary_tokens
+            evicted = len(self._evicted)
+            # The latest message is kept even when it is over the budget on its own.
+            while len(self.window) > 1 and self.tokens(self.window) > window_budget:
+                self._evicted.append(self.window.pop(0))
+            if len(self._evicted) > evicted:
+                # While the summary updates keep failing, the oldest turns are lost
+                # rather than the messages to summarize growing without bounds.
+                while self.tokens(self._evicted) > self.max_tokens:
+                    self._evicted.pop(0)
+                self._pending = self._executor.submit(self._summarize)
+
+    def messages(self) -> list[Message]:
+        """The history to send with the next question."""
+        with self._lock:
+            history: list[Message] = []
+            if self.summary:
+                history.append(
+                    {
+                        "role": "system",
+                        "content": f"Summary of the earlier conversation: "
+                        f"{self.summary}",
+                    }
+                )
+            # The most recent evicted turns that fit next to the summary and window.
+            budget = self.max_tokens - self.tokens(history) - self.tokens(self.window)
+            recent: list[Message] = []
+            for message in reversed(self._evicted):
+                budget -= message_tokens(message)
+                if budget < 0:
+                    break
+                recent.insert(0, message)
+            history += recent + self.window
+        self.saved_tokens = self.full_tokens - self.tokens(history)
+        return history
+
+    @staticmethod
+    def tokens(messages: list[Message]) -> int:
+        return sum(message_tokens(message) for message in messages)
+
+    def _summarize(self) -> None:
+        """
+        Fold the evicted messages into the summary. Runs on the worker thread, where
+        the messages evicted while a previous update was running are folded at once.
+        They stay in the history, as far as the budget allows, until the summary
+        holding them replaces the old one. A failed update is logged and retried with
+        the next eviction.
+        """
+        with self._lock:
+            evicted = list(self._evicted)
+        if not evicted:
+            return
+
+        prompt = SUMMARY_PROMPT.format(
+            # About three quarters of a word per token.
+            words=self.summary_tokens * 3 // 4,
+            summary=self.summary or "(empty)",
+            messages="\n".join(f"{m['role']}: {m['content']}" for m in evicted),
+        )
+        try:
+            summary = str(self.llm.invoke(prompt).content).strip()
+        except Exception:
+            logger.warning("Could not update the conversation summary", exc_info=True)
+            return
+        with self._lock:
+            self.summary = summary
+            # Some of them may have been dropped by `add` in the meantime.
+            folded = {id(message) for message in evicted}
+            self._evicted = [m for m in self._evicted if id(m) not in folded]
+
+    def wait(self) -> None:
+        """Block until the queued summary updates are applied."""
+        if self._pending is not None:
+            self._pending.result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
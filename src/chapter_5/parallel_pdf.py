@@ -0,0 +1,210 @@
+"""
+Parallel PDF loading and splitting.
+
+`PyPDFLoader(mode="page")` extracts the pages of a PDF one after the other, which is
+the slowest step of ingesting a large document. `iter_pdf_chunks` splits the page
+numbers into ranges that worker processes extract and split independently, and
+yields the chunks in page order while only a few ranges are in flight at a time.
+`load_and_split_pdf` collects them into a list. The metadata matches the one produced
+by `PyPDFLoader`.
+
+Usage:
+    python -m src.chapter_5.parallel_pdf --pages 900 --workers 1 2 4 8
+"""
+
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ContentStream, DictionaryObject, NameObject
+
+
+def base_metadata(pdf_path: str) -> dict[str, Any]:
+    """
+    The document-level metadata `PyPDFLoader` attaches to every page.
+    """
+    first_page = next(PyPDFLoader(file_path=pdf_path, mode="page").lazy_load())
+    return {
+        key: value
+        for key, value in first_page.metadata.items()
+        if key not in ("page", "page_label")
+    }
+
+
+def load_page_range(
+    pdf_path: str,
+    start: int,
+    stop: int,
+    metadata: dict[str, Any],
+    text_splitter: TextSplitter | None = None,
+) -> list[Document]:
+    """
+    Extract the pages in [start, stop) and split them when a splitter is given.
+    Runs in the worker processes.
+    """
+    reader = PdfReader(pdf_path)
+    page_labels = reader.page_labels
+    docs = [
+        Document(
+            page_content=reader.pages[page]
+            .extract_text(extraction_mode="plain")
+            .strip(),
+            metadata=metadata | {"page": page, "page_label": page_labels[page]},
+        )
+        for page in range(start, stop)
+    ]
+    if text_splitter is None:
+        return docs
+    return text_splitter.split_documents(docs)
+
+
+def iter_pdf_chunks(
+    pdf_path: str,
+    text_splitter: TextSplitter | None = None,
+    workers: int | None = None,
+    pages_per_task: int | None = None,
+) -> Iterator[Document]:
+    """
+    Load the pages of a PDF in parallel, split them in the worker processes and
+    yield the chunks in page order. At most two page ranges per worker are loaded
+    ahead of the consumer.
+    """
+    workers = workers or os.cpu_count() or 1
+    total_pages = len(PdfReader(pdf_path).pages)
+    if total_pages == 0:
+        return
+
+    metadata = base_metadata(pdf_path)
+    # A few tasks per worker balance pages that take longer to extract.
+    pages_per_task = pages_per_task or math.ceil(total_pages / (workers * 4))
+    ranges = [
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(0, total_pages, pages_per_task)
+    ]
+
+    if workers == 1:
+        for start, stop in ranges:
+            yield from load_page_range(pdf_path, start, stop, metadata, text_splitter)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future[list[Document]]] = deque()
+        for start, stop in ranges:
+            pending.append(
+                executor.submit(
+                    load_page_range, pdf_path, start, stop, metadata, text_splitter
+                )
+            )
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def load_and_split_pdf(
+    pdf_path: str,
+    text_splitter: TextSplitter | None = None,
+    workers: int | None = None,
+    pages_per_task: int | None = None,
+) -> list[Document]:
+    """
+    Load the pages of a PDF in parallel and split them in the worker processes.
+    The chunks are returned in page order.
+    """
+    return list(iter_pdf_chunks(pdf_path, text_splitter, workers, pages_per_task))
+
+
+def generate_pdf(pdf_path: str, pages: int, seed: int = 0) -> None:
+    """
+    Write a text-only PDF with `pages` pages of random words for benchmarking.
+    """
+    words = (
+        "policy agency federal department program reform budget executive "
+        "administration congress secretary office national security energy "
+        "education health labor commerce treasury justice state defense"
+    ).split()
+    rng = random.Random(seed)
+
+    writer = PdfWriter()
+    for number in range(pages):
+        page = writer.add_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {
+                NameObject("/Font"): DictionaryObject(
+                    {
+                        NameObject("/F1"): DictionaryObject(
+                            {
+                                NameObject("/Type"): NameObject("/Font"),
+                                NameObject("/Subtype"): NameObject("/Type1"),
+                                NameObject("/BaseFont"): NameObject("/Helvetica"),
+                            }
+                        )
+                    }
+                )
+            }
+        )
+        lines = [f"Page {number + 1}"] + [
+            " ".join(rng.choices(words, k=12)) for _ in range(50)
+        ]
+        content = ContentStream(None, None)
+        content.set_data(
+            (
+                "BT /F1 10 Tf 12 TL 50 750 Td "
+                + " ".join(f"({line}) '" for line in lines)
+                + " ET"
+            ).encode()
+        )
+        page.replace_contents(content)
+
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark parallel PDF loading.")
+    parser.add_argument("--pdf", help="PDF to load (default: a generated one)")
+    parser.add_argument("--pages", type=int, default=900)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+    with tempfile.TemporaryDirectory() as directory:
+        pdf_path = args.pdf
+        if pdf_path is None:
+            pdf_path = os.path.join(directory, "generated.pdf")
+            generate_pdf(pdf_path, args.pages)
+
+        started = time.perf_counter()
+        expected = text_splitter.split_documents(
+            PyPDFLoader(file_path=pdf_path, mode="page").load()
+        )
+        baseline = time.perf_counter() - started
+        print(f"PyPDFLoader + split: {baseline:.2f}s, {len(expected)} chunks")
+
+        for workers in args.workers:
+            started = time.perf_counter()
+            docs = load_and_split_pdf(pdf_path, text_splitter, workers=workers)
+            elapsed = time.perf_counter() - started
+            same = [(d.page_content, d.metadata) for d in docs] == [
+                (d.page_content, d.metadata) for d in expected
+            ]
+            print(
+                f"{workers:>2} workers: {elapsed:.2f}s ({baseline / elapsed:.1f}x), "
+                f"{len(docs)} chunks, identical to PyPDFLoader: {same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,21 @@
 import os
 
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
 from langchain_ollama import OllamaEmbeddings
-from langchain_pinecone import PineconeVectorStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pinecone import Pinecone
 
-
-def load_pdf_documents(pdf_path: str) -> list[Document]:
-    """
-    Load the PDF documents from the given path.
-    """
-    loader = PyPDFLoader(file_path=pdf_path, mode="page")
-    docs = loader.load()
-    return docs
+from src.chapter_5.parallel_pdf import load_and_split_pdf
+from src.chapter_5.pinecone_pipeline import PineconeIngester, pinecone_upsert
 
 
-def split_documents(docs: list[Document]) -> list[Document]:
+def load_and_split_pdf_documents(pdf_path: str) -> list[Document]:
     """
-    Split the documents into smaller chunks.
+    Load the PDF pages and split them into smaller chunks, in parallel processes.
     """
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    return text_splitter.split_documents(docs)
+    return load_and_split_pdf(pdf_path, text_splitter=text_splitter)
 
 
 def get_embeddings() -> OllamaEmbeddings:
@@ -34,21 +27,19 @@ def get_embeddings() -> OllamaEmbeddings:
 
 def save_embeddings(docs: list[Document], embeddings: OllamaEmbeddings) -> None:
     """
-    Save the embeddings to Pinecone.
+    Save the embeddings to Pinecone, embedding the next batch while the previous
+    ones are upserted. Vector ids are derived from the chunk source, position and
+    text, so running the ingestion again does not duplicate the vectors.
     """
-    index_name = os.getenv("PINECONE_CHAPTER_5_INDEX_NAME")
-    batch_size = 100
-
-    for i in range(0, len(docs), batch_size):
-        batch = docs[i : i + batch_size]
-        print(
-            f"Processing batch {i // batch_size + 1} of {(len(docs) + batch_size - 1) // batch_size}"
-        )
-        PineconeVectorStore.from_documents(
-            documents=batch,
-            embedding=embeddings,
-            index_name=index_name,
-        )
+    index = Pinecone().Index(os.environ["PINECONE_CHAPTER_5_INDEX_NAME"])
+    ingester = PineconeIngester(
+        embeddings, pinecone_upsert(index), batch_size=100, max_in_flight=4
+    )
+    stats = ingester.ingest(docs)
+    print(
+        f"Upserted {stats.vectors} vectors in {stats.batches} batches "
+        f"({stats.vectors_per_second:.0f} vectors/s, {stats.retries} retries)"
+    )
 
 
 def main() -> None:
@@ -60,11 +51,8 @@ def main() -> None:
     current_dir = os.path.dirname(os.path.abspath(__file__))
     pdf_path = os.path.join(current_dir, "./files/project_2025.pdf")
 
-    docs = load_pdf_documents(pdf_path=pdf_path)
-    print("Loaded PDF: ", len(docs))
-
-    split_docs = split_documents(docs=docs)
-    print("Split documents: ", len(split_docs))
+    split_docs = load_and_split_pdf_documents(pdf_path=pdf_path)
+    print("Loaded and split PDF: ", len(split_docs))
 
     save_embeddings(docs=split_docs, embeddings=get_embeddings())
     print("Saved embeddings to Pinecone!")
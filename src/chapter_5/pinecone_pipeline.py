@@ -0,0 +1,270 @@
+"""
+Pipelined, idempotent ingestion into a Pinecone index.
+
+`PineconeIngester` embeds the chunks batch by batch on the calling thread and hands
+every embedded batch to a pool of upload threads, so batch N+1 is embedded while
+batch N is being upserted. At most `max_in_flight` upserts are pending at a time,
+and a failed upsert is retried with exponential backoff.
+
+Vector ids are the sha256 of the chunk source, its position within the source and its
+text, so ingesting the same document again overwrites the existing vectors instead of
+adding duplicates, while identical chunks of different sources are kept apart.
+
+The benchmark runs against a local stand-in for the Pinecone data plane, with a
+configurable upsert latency and failure rate:
+
+Usage:
+    python -m src.chapter_5.pinecone_pipeline --chunks 2000 --in-flight 1 4 8
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import batched
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from pinecone import Pinecone
+
+from src.common.embedding_cache import content_key
+
+# The metadata key `PineconeVectorStore` reads the chunk text from.
+TEXT_KEY = "text"
+
+type Vector = dict[str, Any]
+type Upsert = Callable[[list[Vector]], None]
+
+
+def vector_id(doc: Document, chunk_index: int) -> str:
+    source = doc.metadata.get("source", "")
+    return content_key(f"{source}\0{chunk_index}\0{doc.page_content}")
+
+
+def with_vector_ids(docs: Iterable[Document]) -> Iterator[Document]:
+    """Give the chunks without an id their vector id, numbering them per source."""
+    chunk_indexes: Counter[str] = Counter()
+    for doc in docs:
+        source = str(doc.metadata.get("source", ""))
+        chunk_index = chunk_indexes[source]
+        chunk_indexes[source] += 1
+        if doc.id is None:
+            doc = doc.model_copy(update={"id": vector_id(doc, chunk_index)})
+        yield doc
+
+
+def pinecone_upsert(index: Any, namespace: str | None = None) -> Upsert:
+    """Upsert function of a Pinecone index."""
+
+    def upsert(vectors: list[Vector]) -> None:
+        index.upsert(vectors=vectors, namespace=namespace)
+
+    return upsert
+
+
+@dataclass
+class IngestionStats:
+    vectors: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def vectors_per_second(self) -> float:
+        return self.vectors / self.seconds if self.seconds else 0.0
+
+
+class PineconeIngester:
+    """
+    Embeds batches of chunks and upserts them concurrently with the embedding of
+    the following batches.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        upsert: Upsert,
+        batch_size: int = 100,
+        max_in_flight: int = 4,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+    ) -> None:
+        self.embeddings = embeddings
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def ingest(self, docs: Iterable[Document]) -> IngestionStats:
+        stats = IngestionStats()
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            in_flight: deque[Future[int]] = deque()
+            for batch in batched(with_vector_ids(docs), self.batch_size, strict=False):
+                vectors = self.embed(batch)
+                # Wait for the oldest upsert when the limit is reached.
+                if len(in_flight) >= self.max_in_flight:
+                    stats.retries += in_flight.popleft().result()
+                in_flight.append(executor.submit(self.upsert_batch, vectors))
+                stats.batches += 1
+                stats.vectors += len(vectors)
+            while in_flight:
+                stats.retries += in_flight.popleft().result()
+
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def embed(self, docs: Iterable[Document]) -> list[Vector]:
+        """Embed chunks that have their id, see `with_vector_ids`."""
+        # Only the last of the chunks sharing an id is kept.
+        unique = {str(doc.id): doc for doc in docs}
+        values = self.embeddings.embed_documents(
+            [doc.page_content for doc in unique.values()]
+        )
+        return [
+            {
+                "id": doc_id,
+                "values": vector,
+                "metadata": doc.metadata | {TEXT_KEY: doc.page_content},
+            }
+            for (doc_id, doc), vector in zip(unique.items(), values, strict=True)
+        ]
+
+    def upsert_batch(self, vectors: list[Vector]) -> int:
+        """Upsert a batch, retrying on errors. Returns the number of retries."""
+        attempt = 0
+        while True:
+            try:
+                self.upsert(vectors)
+                return attempt
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+            # Jittered, so that failed batches do not retry in lockstep.
+            time.sleep(self.backoff * 2**attempt * random.uniform(0.5, 1.5))
+            attempt += 1
+
+
+class StandInServer:
+    """
+    Local HTTP server answering the Pinecone upsert endpoint, for benchmarks.
+    """
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0) -> None:
+        self.vectors: dict[str, Vector] = {}
+        self.requests = 0
+        self.failures = 0
+        lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(latency)
+                with lock:
+                    server.requests += 1
+                    failed = random.random() < failure_rate
+                    server.failures += failed
+                    if not failed:
+                        for vector in body["vectors"]:
+                            server.vectors[vector["id"]] = vector
+
+                payload: dict[str, Any]
+                if failed:
+                    status, payload = 503, {"error": "unavailable"}
+                else:
+                    status, payload = 200, {"upsertedCount": len(body["vectors"])}
+                response = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def host(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that take `latency` seconds per batch, like a local model."""
+
+    latency: float = 0.05
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency)
+        # Plain floats, as returned by the Ollama client.
+        return [list(map(float, vector)) for vector in super().embed_documents(texts)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark pipelined ingestion against a stand-in Pinecone server."
+    )
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--upsert-latency", type=float, default=0.1)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    docs = [
+        Document(page_content=f"chunk {i} " * 20, metadata={"page": i // 5})
+        for i in range(args.chunks)
+    ]
+    embeddings = SlowEmbeddings(size=args.dimension, latency=args.embed_latency)
+
+    server = StandInServer(args.upsert_latency, args.failure_rate)
+    index = Pinecone(api_key="stand-in").Index(host=server.host)
+    try:
+        # The previous approach: embed a batch, then wait for its upsert.
+        ingester = PineconeIngester(embeddings, pinecone_upsert(index), backoff=0.05)
+        started = time.perf_counter()
+        for batch in batched(with_vector_ids(docs), args.batch_size, strict=False):
+            ingester.upsert_batch(ingester.embed(batch))
+        serial = time.perf_counter() - started
+        print(f"serial: {args.chunks / serial:.0f} vectors/s")
+
+        for in_flight in args.in_flight:
+            failures = server.failures
+            ingester = PineconeIngester(
+                embeddings,
+                pinecone_upsert(index),
+                batch_size=args.batch_size,
+                max_in_flight=in_flight,
+                backoff=0.05,
+            )
+            stats = ingester.ingest(docs)
+            print(
+                f"{in_flight:>2} in flight: {stats.vectors_per_second:.0f} vectors/s "
+                f"({serial / stats.seconds:.1f}x), "
+                f"{server.failures - failures} failed upserts retried, "
+                f"{len(server.vectors)} vectors stored"
+            )
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,26 +6,40 @@ from langchain.chains.retrieval import create_retrieval_chain
 from langchain_ollama import ChatOllama, OllamaEmbeddings
 from langchain_pinecone import PineconeVectorStore
 
+from src.chapter_5.memory import ConversationMemory
+from src.chapter_5.sharded_retriever import ShardedRetriever
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+
 
 def pinecone_rag() -> None:
     """
     RAG of the Project 2025 PDF using Pinecone.
     """
-    llm = ChatOllama(model="llama3.1:8b")
+    llm = ChatOllama(
+        model="llama3.1:8b", cache=llm_cache(), callbacks=telemetry_callbacks()
+    )
     embeddings = OllamaEmbeddings(model="nomic-embed-text")
 
     retrieval_qa_chat_prompt = hub.pull("langchain-ai/retrieval-qa-chat")
     combine_docs_chain = create_stuff_documents_chain(llm, retrieval_qa_chat_prompt)
 
-    index_name = os.getenv("PINECONE_CHAPTER_5_INDEX_NAME")
-    vectorstore = PineconeVectorStore(index_name=index_name, embedding=embeddings)
+    # Comma-separated index names, searched as shards of one corpus.
+    index_names = os.environ["PINECONE_CHAPTER_5_INDEX_NAME"].split(",")
+    retriever = ShardedRetriever(
+        shards=[
+            PineconeVectorStore(index_name=index_name, embedding=embeddings)
+            for index_name in index_names
+        ],
+        embeddings=embeddings,
+    )
 
     retrieval_chain = create_retrieval_chain(
-        retriever=vectorstore.as_retriever(), combine_docs_chain=combine_docs_chain
+        retriever=retriever, combine_docs_chain=combine_docs_chain
     )
 
-    # Initialize conversation history
-    chat_history: list[dict[str, str]] = []
+    # Recent turns within the token budget, older ones summarized
+    memory = ConversationMemory(llm)
 
     while True:
         question = input("> Enter a question (or /bye to exit): ")
@@ -33,18 +47,26 @@ def pinecone_rag() -> None:
             break
 
         # Add the current question to chat history
-        chat_history.append({"role": "user", "content": question})
+        memory.add("user", question)
 
         # Include chat history in the chain's input
+        chat_history = memory.messages()
         response = retrieval_chain.invoke(
-            input={"input": question, "chat_history": chat_history}
+            input={"input": question, "chat_history": chat_history},
+            config={"callbacks": telemetry_callbacks()},
         )
 
         answer: str = response.get("answer")
         print("\n\n", answer.strip(), "\n\n")
+        print(
+            f"(chat history: {memory.tokens(chat_history)} tokens, "
+            f"{memory.saved_tokens} saved)\n"
+        )
 
         # Add the model's response to chat history
-        chat_history.append({"role": "assistant", "content": answer})
+        memory.add("assistant", answer)
+
+    memory.close()
 
 
 if __name__ == "__main__":
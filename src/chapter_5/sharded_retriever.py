@@ -0,0 +1,202 @@
+"""
+Fan-out retrieval across several vector index shards.
+
+`ShardedRetriever` embeds the question once, searches every shard concurrently, and
+merges the results into the overall top k by relevance score with a heap. Shards
+that do not answer within `timeout` seconds are left out of the answer instead of
+holding it up. Shards can be FAISS indexes or Pinecone indexes
+(`PineconeVectorStore`), or a mix of both.
+
+The retriever is a regular LangChain retriever, so it plugs into
+`create_retrieval_chain` like `vectorstore.as_retriever()`.
+
+Usage:
+    python -m src.chapter_5.sharded_retriever --shards 1 2 4 8 --latency 0.02
+"""
+
+import argparse
+import heapq
+import time
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from itertools import chain
+from typing import Any
+
+import numpy
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict, PrivateAttr
+
+type ScoredDocument = tuple[Document, float]
+
+
+def search_shard(
+    shard: VectorStore, embedding: list[float], k: int
+) -> list[ScoredDocument]:
+    """
+    Search a shard by vector, with the distances or similarities converted to
+    relevance scores (higher is better) so that the results of different shards
+    are comparable.
+    """
+    if isinstance(shard, FAISS):
+        results = shard.similarity_search_with_score_by_vector(embedding, k)
+    else:
+        # PineconeVectorStore and other stores with the same interface.
+        results = shard.similarity_search_by_vector_with_score(embedding, k)  # type: ignore[attr-defined]
+    relevance = shard._select_relevance_score_fn()
+    return [(doc, float(relevance(score))) for doc, score in results]
+
+
+class ShardedRetriever(BaseRetriever):
+    """
+    Retrieves the top `k` documents of all the `shards`, searched concurrently.
+    Each result carries its `relevance_score` and `shard` in the metadata.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    shards: Sequence[VectorStore]
+    embeddings: Embeddings
+    k: int = 4
+    # Seconds to wait for the shards, measured from the start of the search.
+    timeout: float = 2.0
+
+    _executor: ThreadPoolExecutor = PrivateAttr()
+    # Number of shard searches left out because they timed out or failed.
+    _skipped: int = PrivateAttr(default=0)
+
+    def model_post_init(self, context: Any) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.shards)))
+
+    @property
+    def skipped(self) -> int:
+        return self._skipped
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        embedding = self.embeddings.embed_query(query)
+        futures: dict[Future[list[ScoredDocument]], int] = {
+            self._executor.submit(search_shard, shard, embedding, self.k): number
+            for number, shard in enumerate(self.shards)
+        }
+        done, not_done = wait(futures, timeout=self.timeout)
+
+        results: list[list[tuple[Document, float, int]]] = []
+        for future in done:
+            if future.exception() is not None:
+                self._skipped += 1
+                continue
+            shard = futures[future]
+            results.append([(doc, score, shard) for doc, score in future.result()])
+        # A search cannot be interrupted, its result is ignored when it completes.
+        self._skipped += len(not_done)
+
+        top = heapq.nlargest(self.k, chain.from_iterable(results), key=lambda r: r[1])
+        return [
+            doc.model_copy(
+                update={
+                    "metadata": doc.metadata
+                    | {"relevance_score": score, "shard": shard}
+                }
+            )
+            for doc, score, shard in top
+        ]
+
+
+class RemoteShard(FAISS):
+    """FAISS shard with a simulated network round trip, for the benchmark."""
+
+    latency = 0.0
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: list[float], k: int = 4, *args: Any, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        time.sleep(self.latency)
+        return super().similarity_search_with_score_by_vector(
+            embedding, k, *args, **kwargs
+        )
+
+
+def build_shards(
+    vectors: numpy.ndarray, count: int, embeddings: Embeddings, latency: float
+) -> list[RemoteShard]:
+    """Split the vectors into `count` FAISS shards."""
+    shards: list[RemoteShard] = []
+    offset = 0
+    for part in numpy.array_split(vectors, count):
+        shard = RemoteShard.from_embeddings(
+            [(f"doc {offset + i}", list(vector)) for i, vector in enumerate(part)],
+            embeddings,
+        )
+        assert isinstance(shard, RemoteShard)
+        shard.latency = latency
+        shards.append(shard)
+        offset += len(part)
+    return shards
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark fan-out retrieval latency across shard counts."
+    )
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.02, help="Per shard")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = numpy.random.default_rng(0)
+    vectors = rng.normal(size=(args.vectors, args.dimension)).astype(numpy.float32)
+    embeddings = DeterministicFakeEmbedding(size=args.dimension)
+    queries = [f"question {i}" for i in range(args.queries)]
+
+    single = build_shards(vectors, 1, embeddings, args.latency)[0]
+    expected = [
+        [doc.page_content for doc in single.similarity_search(query, k=args.k)]
+        for query in queries
+    ]
+
+    print(f"{'shards':>6} {'p50 ms':>8} {'p99 ms':>8} {'same top k':>11}")
+    for count in args.shards:
+        retriever = ShardedRetriever(
+            shards=build_shards(vectors, count, embeddings, args.latency),
+            embeddings=embeddings,
+            k=args.k,
+        )
+        latencies = []
+        same = 0
+        for query, top in zip(queries, expected, strict=True):
+            started = time.perf_counter()
+            docs = retriever.invoke(query)
+            latencies.append(time.perf_counter() - started)
+            same += [doc.page_content for doc in docs] == top
+        print(
+            f"{count:>6} {numpy.percentile(latencies, 50) * 1000:>8.1f} "
+            f"{numpy.percentile(latencies, 99) * 1000:>8.1f} "
+            f"{same / len(queries):>11.0%}"
+        )
+
+    # One shard answering after the timeout does not delay the answer.
+    shards = build_shards(vectors, 4, embeddings, args.latency)
+    shards[0].latency = 1.0
+    retriever = ShardedRetriever(
+        shards=shards, embeddings=embeddings, k=args.k, timeout=0.2
+    )
+    started = time.perf_counter()
+    retriever.invoke(queries[0])
+    print(
+        f"\n4 shards, one taking 1s with a 0.2s timeout: "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms, "
+        f"{retriever.skipped} shard skipped"
+    )
+
+
+if __name__ == "__main__":
+    main()
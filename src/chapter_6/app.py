@@ -1,69 +1,54 @@
+import time
+from collections.abc import Iterator
+from typing import Any
+
 import streamlit
 import streamlit_chat
-from langchain import hub
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains.history_aware_retriever import create_history_aware_retriever
-from langchain.chains.retrieval import create_retrieval_chain
-from langchain_community.vectorstores import FAISS
-from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+from src.chapter_6.resources import RagResources
+from src.common.telemetry import telemetry_callbacks
 
 
-def answer_question(question: str) -> dict[str, str]:
+@streamlit.cache_resource(show_spinner="Loading the models and the index...")
+def rag_resources() -> RagResources:
     """
-    Answer a question using the LangChain library.
+    Build the models, prompts and index once per server process, shared by all the
+    sessions.
     """
-    embeddings = OllamaEmbeddings(model="nomic-embed-text")
+    resources = RagResources()
+    resources.warm_up()
+    return resources
 
-    vectorstore = FAISS.load_local(
-        "chapter_6_faiss_index", embeddings, allow_dangerous_deserialization=True
-    )
-    llm = ChatOllama(model="llama3.1:8b")
-
-    retrieval_qa_chat_prompt = hub.pull("langchain-ai/retrieval-qa-chat")
-    combine_docs_chain = create_stuff_documents_chain(
-        llm=llm, prompt=retrieval_qa_chat_prompt
-    )
-
-    rephrase_prompt = hub.pull("langchain-ai/chat-langchain-rephrase")
-    history_aware_retriever = create_history_aware_retriever(
-        llm=llm,
-        prompt=rephrase_prompt,
-        retriever=vectorstore.as_retriever(),
-    )
-
-    retrieval_chain = create_retrieval_chain(
-        retriever=history_aware_retriever, combine_docs_chain=combine_docs_chain
-    )
 
-    response = retrieval_chain.invoke(
+def stream_answer(question: str) -> Iterator[dict[str, Any]]:
+    """
+    Answer a question using the LangChain library, streaming the chain output: the
+    retrieved documents as soon as retrieval completes, then the answer tokens.
+    """
+    retrieval_chain = rag_resources().chain()
+    yield from retrieval_chain.stream(
         input={
             "input": question,
             "chat_history": streamlit.session_state.chat_history,
-        }
+        },
+        config={"callbacks": telemetry_callbacks()},
     )
 
-    return {
-        "query": response["input"],
-        "result": response["answer"],
-        "source_documents": response["context"],
-    }
-
 
 def format_sources(sources: set[str]) -> str:
     """
-    Format the sources from the answer_question function.
+    Format the sources of the retrieved documents.
     """
     sources_list = list(sources)
     sources_list.sort()
     return "\n".join(f"{i + 1}. {source}" for i, source in enumerate(sources_list))
 
 
-def format_response(answer: dict[str, str]) -> str:
+def format_response(answer: str, sources: set[str]) -> str:
     """
-    Format the response from the answer_question function.
+    Format the answer with its sources.
     """
-    sources = {doc.metadata["source"] for doc in answer.get("source_documents")}
-    return f"{answer.get('result')}\n\nSources:\n{format_sources(sources)}"
+    return f"{answer}\n\nSources:\n{format_sources(sources)}"
 
 
 # Configure the Streamlit page with a clean, modern look
@@ -79,6 +64,9 @@ streamlit.set_page_config(
     },
 )
 
+# Load the shared resources before the first question
+rag_resources()
+
 # Initialize session state
 if (
     "questions_history" not in streamlit.session_state
@@ -88,6 +76,8 @@ if (
     streamlit.session_state.questions_history = []
     streamlit.session_state.answers_history = []
     streamlit.session_state.chat_history = []
+if "time_to_first_token" not in streamlit.session_state:
+    streamlit.session_state.time_to_first_token = []
 
 # Create a clean layout with columns
 main_container = streamlit.container()
@@ -138,6 +128,15 @@ with streamlit.sidebar:
             avg_words = total_words / total_messages
             streamlit.metric("Avg. Words/Message", f"{avg_words:.1f}")
 
+        ttft_history = streamlit.session_state.time_to_first_token
+        if ttft_history:
+            col1, col2 = streamlit.columns(2)
+            with col1:
+                streamlit.metric("Time to First Token", f"{ttft_history[-1]:.2f}s")
+            with col2:
+                average = sum(ttft_history) / len(ttft_history)
+                streamlit.metric("Avg. TTFT", f"{average:.2f}s")
+
     # Model info in a clean card
     with streamlit.expander("🤖 Model Info", expanded=True):
         streamlit.markdown("""
@@ -168,29 +167,40 @@ with streamlit.container():
                 use_container_width=True,
             )
 
-# Process the input with improved feedback
+# Process the input, rendering the sources and answer tokens as they arrive
 if submit and prompt:
-    with streamlit.status("Thinking...") as status:
-        # Show a progress message
-        status.update(label="Searching documentation...", state="running")
-
-        # Get the answer
-        answer = answer_question(prompt)
-        response = format_response(answer)
-
-        # Update status
-        status.update(label="Processing response...", state="running")
-
-        # Update session state
-        streamlit.session_state.questions_history.append(prompt)
-        streamlit.session_state.answers_history.append(response)
-        streamlit.session_state.chat_history.append({"role": "user", "content": prompt})
-        streamlit.session_state.chat_history.append(
-            {"role": "assistant", "content": response}
-        )
+    started = time.perf_counter()
+    time_to_first_token: float | None = None
+    answer = ""
+    sources: set[str] = set()
 
-        # Complete status
-        status.update(label="Done!", state="complete")
+    with chat_container:
+        streamlit.markdown(f"**You:** {prompt}")
+        sources_placeholder = streamlit.empty()
+        answer_placeholder = streamlit.empty()
+    sources_placeholder.info("Searching documentation...")
+
+    for chunk in stream_answer(prompt):
+        if "context" in chunk:
+            sources = {doc.metadata["source"] for doc in chunk["context"]}
+            sources_placeholder.markdown(f"Sources:\n{format_sources(sources)}")
+        if "answer" in chunk:
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - started
+            answer += chunk["answer"]
+            answer_placeholder.markdown(f"{answer}▌")
+
+    response = format_response(answer, sources)
+
+    # Update session state
+    streamlit.session_state.questions_history.append(prompt)
+    streamlit.session_state.answers_history.append(response)
+    streamlit.session_state.chat_history.append({"role": "user", "content": prompt})
+    streamlit.session_state.chat_history.append(
+        {"role": "assistant", "content": response}
+    )
+    if time_to_first_token is not None:
+        streamlit.session_state.time_to_first_token.append(time_to_first_token)
 
     # Rerun to update the UI
     streamlit.rerun()
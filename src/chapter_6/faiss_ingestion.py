@@ -1,47 +1,198 @@
 """
 This script is used to ingest the documents into FAISS.
-Note that it takes a while to run.
+Note that the first run takes a while.
+
+The ingestion is incremental: a manifest saved next to the index maps every source
+file to its content hash and the ids of its vectors. On the following runs only the
+new and changed files are loaded, split and embedded, the vectors of the changed and
+removed files are deleted, and the updated index is saved. Pass `--full` to rebuild
+the index from scratch. Approximate indexes (`--index-type`) do not support deleting
+vectors, so changed and removed files require `--full` with them.
+
+Files are loaded lazily and their chunks embedded and added to the index in
+fixed-size batches, with periodic checkpoint saves, so the memory used on top of the
+index is bounded by the batch size rather than by the size of the crawl.
+
+Usage:
+    python -m src.chapter_6.faiss_ingestion [--full] [--index-type ivf_flat]
 """
 
+import argparse
+import hashlib
+import json
 import os
+import time
+from collections.abc import Iterator
+from typing import Any
 
 from dotenv import load_dotenv
-from langchain_community.document_loaders import DirectoryLoader
+from langchain_community.document_loaders import UnstructuredFileLoader
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-from langchain_ollama import OllamaEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from src.common.ann_index import (
+    IndexSpec,
+    add_index_arguments,
+    index_spec_from_args,
+    supports_deletion,
+)
+from src.common.embedding_cache import CachedEmbeddings, cached_embeddings
+from src.common.faiss_storage import index_exists, load_index, save_index
+from src.common.streaming_ingestion import ingest_documents, iter_split, peak_rss_mb
 
-def load_documents(path: str) -> list[Document]:
-    """
-    Load the documents from the given path.
-    """
-    loader = DirectoryLoader(path, glob="**/*.html", show_progress=True)
-    docs = loader.load()
-    return docs
+INDEX_PATH = "chapter_6_faiss_index"
+MANIFEST_FILE = "manifest.json"
+DOCS_URL = "https://python.langchain.com"
+
+type Manifest = dict[str, dict[str, Any]]
+
+
+text_splitter = RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=50)
 
 
-def split_documents(docs: list[Document]) -> list[Document]:
+def load_file(path: str, relative_path: str) -> Iterator[Document]:
     """
-    Split the documents into smaller chunks.
+    Lazily load a file, relative to `path`.
     """
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=50)
-    return text_splitter.split_documents(docs)
+    return UnstructuredFileLoader(os.path.join(path, relative_path)).lazy_load()
 
 
-def get_embeddings() -> OllamaEmbeddings:
+def get_embeddings() -> CachedEmbeddings:
     """
-    Get the embeddings model.
+    Get the embeddings model, backed by the on-disk embedding cache so that
+    unchanged chunks are not embedded again.
     """
-    return OllamaEmbeddings(model="nomic-embed-text")
+    return cached_embeddings(model="nomic-embed-text")
 
 
-def save_embeddings(docs: list[Document], embeddings: OllamaEmbeddings) -> None:
+def file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_files(path: str) -> dict[str, str]:
+    """
+    Map every HTML file under `path`, relative to it, to its content hash.
+    """
+    files = {}
+    for root, _, file_names in os.walk(path):
+        for file_name in file_names:
+            if file_name.endswith(".html"):
+                file_path = os.path.join(root, file_name)
+                files[os.path.relpath(file_path, path)] = file_hash(file_path)
+    return dict(sorted(files.items()))
+
+
+def read_manifest(index_path: str) -> Manifest:
+    manifest_path = os.path.join(index_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        manifest: Manifest = json.load(f)
+    return manifest
+
+
+def write_manifest(index_path: str, manifest: Manifest) -> None:
+    manifest_path = os.path.join(index_path, MANIFEST_FILE)
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+
+def ingest(
+    path: str,
+    index_path: str = INDEX_PATH,
+    full: bool = False,
+    batch_size: int = 256,
+    index_spec: IndexSpec | None = None,
+) -> None:
     """
-    Save the embeddings to FAISS local storage.
+    Bring the index at `index_path` up to date with the HTML files under `path`.
+    A new index is built according to `index_spec`; an existing one keeps its type.
     """
-    FAISS.from_documents(docs, embeddings).save_local("chapter_6_faiss_index")
+    embeddings = get_embeddings()
+    files = scan_files(path)
+
+    manifest: Manifest = {}
+    vectorstore: FAISS | None = None
+    if not full and os.path.exists(index_path):
+        manifest = read_manifest(index_path)
+        # An index built before the manifest existed cannot be updated in place.
+        if manifest and index_exists(index_path):
+            vectorstore = load_index(index_path, embeddings, mmap=False)
+        else:
+            manifest = {}
+
+    changed = [
+        file
+        for file, digest in files.items()
+        if manifest.get(file, {}).get("hash") != digest
+    ]
+    removed = [file for file in manifest if file not in files]
+    print(
+        f"Files: {len(files)} total, {len(changed)} new or changed, "
+        f"{len(removed)} removed"
+    )
+
+    stale_ids = [
+        vector_id
+        for file in removed + changed
+        for vector_id in manifest.get(file, {}).get("ids", [])
+    ]
+    if vectorstore is not None and stale_ids:
+        if not supports_deletion(vectorstore.index):
+            raise ValueError(
+                f"The index at {index_path} cannot delete the vectors of changed "
+                "files, rebuild it with --full"
+            )
+        vectorstore.delete(stale_ids)
+    for file in removed + changed:
+        manifest.pop(file, None)
+
+    def iter_chunks() -> Iterator[Document]:
+        for count, file in enumerate(changed, start=1):
+            ids: list[str] = []
+            for doc in iter_split(load_file(path, file), text_splitter):
+                # Update the source URL to the actual URL of the documentation.
+                doc.metadata["source"] = doc.metadata["source"].replace(path, DOCS_URL)
+                doc.id = f"{file}#{len(ids)}"
+                ids.append(doc.id)
+                yield doc
+            # Every chunk of the file has been handed to the index at this point.
+            manifest[file] = {"hash": files[file], "ids": ids}
+            if count % 100 == 0:
+                print(f"Indexed {count}/{len(changed)} files")
+
+    def checkpoint(vectorstore: FAISS) -> None:
+        """
+        Save the index with the manifest of the files whose vectors are all in it,
+        so that an interrupted run resumes from there.
+        """
+        save_index(vectorstore, index_path)
+        write_manifest(index_path, manifest)
+
+    rss_before = peak_rss_mb()
+    vectorstore = ingest_documents(
+        iter_chunks(),
+        embeddings,
+        vectorstore=vectorstore,
+        batch_size=batch_size,
+        checkpoint=checkpoint,
+        index_spec=index_spec,
+    )
+    if vectorstore is None:
+        print("No documents to index.")
+        return
+    if removed and not changed:
+        checkpoint(vectorstore)
+
+    print(f"Removed {len(stale_ids)} vectors, {vectorstore.index.ntotal} in the index")
+    print(f"Peak RSS: {rss_before:.0f} MB before, {peak_rss_mb():.0f} MB after")
+    print("Embedding cache: ", embeddings.stats())
 
 
 def main() -> None:
@@ -50,21 +201,29 @@ def main() -> None:
     I'm embedding Project 2025 for the RAG pipeline.
     Why Project 2025? Because it's so retarded I want to see how the LLM handles it.
     """
-    path = os.path.join(os.getcwd(), "chapter_6_langchain_docs/python.langchain.com")
-    docs = load_documents(path=path)
-    print("Loaded documents: ", len(docs))
-
-    split_docs = split_documents(docs=docs)
-    print("Split documents: ", len(split_docs))
-
-    # Update the source URL to the actual URL of the documentation.
-    for doc in split_docs:
-        doc.metadata["source"] = doc.metadata["source"].replace(
-            path, "https://python.langchain.com"
-        )
-
-    save_embeddings(docs=split_docs, embeddings=get_embeddings())
-    print("Saved embeddings to FAISS local storage!")
+    parser = argparse.ArgumentParser(description="Ingest the docs into FAISS.")
+    parser.add_argument(
+        "--path",
+        default=os.path.join(
+            os.getcwd(), "chapter_6_langchain_docs/python.langchain.com"
+        ),
+    )
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument(
+        "--full", action="store_true", help="Rebuild the index from scratch"
+    )
+    add_index_arguments(parser)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ingest(
+        path=args.path,
+        index_path=args.index,
+        full=args.full,
+        index_spec=index_spec_from_args(args),
+    )
+    elapsed = time.perf_counter() - started
+    print(f"Saved embeddings to FAISS local storage in {elapsed:.1f}s!")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""
+Process-wide resources of the chapter 6 RAG app.
+
+The embeddings, the LLM and the hub prompts are created once per server process and
+shared by every session, and the models are warmed up so the first question does not
+pay for loading them. The index is memory-mapped and the retrieval chain built on
+top of it is rebuilt only when the index on disk changes, so the ingestion script can
+update it while the app is running.
+"""
+
+import os
+import threading
+import time
+from typing import Any
+
+from langchain import hub
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain.chains.retrieval import create_retrieval_chain
+from langchain_core.runnables import Runnable
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+from src.chapter_6.speculative_retriever import create_speculative_retriever
+from src.common.faiss_storage import DOCSTORE_FILE, load_index
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+
+INDEX_PATH = "chapter_6_faiss_index"
+LLM_MODEL = "llama3.1:8b"
+EMBEDDINGS_MODEL = "nomic-embed-text"
+
+
+class RagResources:
+    """
+    Models, prompts and the retrieval chain shared across sessions.
+    """
+
+    def __init__(self, index_path: str = INDEX_PATH) -> None:
+        self.index_path = index_path
+        self.embeddings = OllamaEmbeddings(model=EMBEDDINGS_MODEL)
+        self.llm = ChatOllama(
+            model=LLM_MODEL, cache=llm_cache(), callbacks=telemetry_callbacks()
+        )
+        self.qa_prompt = hub.pull("langchain-ai/retrieval-qa-chat")
+        self.rephrase_prompt = hub.pull("langchain-ai/chat-langchain-rephrase")
+
+        self._lock = threading.Lock()
+        self._index_version: tuple[int, int] | None = None
+        self._chain: Runnable[dict[str, Any], dict[str, Any]] | None = None
+        self.reloads = 0
+
+    def index_version(self) -> tuple[int, int]:
+        """
+        Identity of the index files on disk. The docstore is renamed into place
+        after the index when saving, so a new one means a new index.
+        """
+        stat = os.stat(os.path.join(self.index_path, DOCSTORE_FILE))
+        return stat.st_ino, stat.st_mtime_ns
+
+    def chain(self) -> Runnable[dict[str, Any], dict[str, Any]]:
+        """The retrieval chain, rebuilt when the index has changed on disk."""
+        version = self.index_version()
+        with self._lock:
+            if self._chain is None or version != self._index_version:
+                self._chain = self._build_chain()
+                self._index_version = version
+                self.reloads += 1
+            return self._chain
+
+    def _build_chain(self) -> Runnable[dict[str, Any], dict[str, Any]]:
+        vectorstore = load_index(self.index_path, self.embeddings)
+        history_aware_retriever = create_speculative_retriever(
+            llm=self.llm,
+            prompt=self.rephrase_prompt,
+            retriever=vectorstore.as_retriever(),
+        )
+        combine_docs_chain = create_stuff_documents_chain(
+            llm=self.llm, prompt=self.qa_prompt
+        )
+        return create_retrieval_chain(
+            retriever=history_aware_retriever, combine_docs_chain=combine_docs_chain
+        )
+
+    def warm_up(self) -> float:
+        """
+        Load the index and both models into memory. Returns the seconds it took.
+        """
+        started = time.perf_counter()
+        self.chain()
+        self.embeddings.embed_query("warm up")
+        # Not cached, so that Ollama actually loads the model.
+        ChatOllama(model=LLM_MODEL, num_predict=1).invoke("Hi")
+        return time.perf_counter() - started
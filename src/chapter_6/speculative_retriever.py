@@ -0,0 +1,94 @@
+"""
+History-aware retrieval that only waits for the question rewrite when it matters.
+
+`create_history_aware_retriever` rephrases every follow-up question with an LLM call
+before retrieval can start. `create_speculative_retriever` instead:
+
+- retrieves with the question as is when there is no chat history, or when the
+  question looks self-contained (no pronouns or other references to earlier turns
+  and long enough to stand on its own);
+- otherwise retrieves with the raw question while the rewrite runs, and keeps those
+  documents when the rewritten question turns out to be nearly the same, only
+  retrieving again when the rewrite changed it.
+
+It is a drop-in replacement for `create_history_aware_retriever` in
+`create_retrieval_chain`.
+"""
+
+import re
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import BasePromptTemplate
+from langchain_core.retrievers import RetrieverLike
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import get_executor_for_config
+
+# Words that refer back to earlier turns of the conversation.
+REFERENCES = frozenset(
+    """
+    it its it's this these those they them their theirs he him his she her
+    above previous earlier former latter same else also again another
+    """.split()
+)
+# Openings of follow-ups such as "and for X?" or "what about X?".
+FOLLOW_UP = re.compile(r"^(and|but|or|so|what about|how about|why not)\b")
+# Questions shorter than this many words are treated as follow-ups.
+MIN_WORDS = 4
+# Word overlap above which the rewrite is considered the same question.
+SAME_QUESTION = 0.8
+
+
+def words(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def needs_rewrite(question: str, chat_history: list[Any]) -> bool:
+    """Whether the question depends on the chat history to be understood."""
+    if not chat_history:
+        return False
+    question_words = words(question)
+    return (
+        len(question_words) < MIN_WORDS
+        or FOLLOW_UP.match(" ".join(question_words)) is not None
+        or any(word in REFERENCES for word in question_words)
+    )
+
+
+def similarity(first: str, second: str) -> float:
+    """Jaccard similarity of the words of two texts."""
+    first_words, second_words = set(words(first)), set(words(second))
+    if not first_words or not second_words:
+        return 0.0
+    return len(first_words & second_words) / len(first_words | second_words)
+
+
+def create_speculative_retriever(
+    llm: BaseChatModel, retriever: RetrieverLike, prompt: BasePromptTemplate[Any]
+) -> Runnable[dict[str, Any], list[Document]]:
+    """
+    Retriever over `{"input": ..., "chat_history": ...}` that rephrases the question
+    with `prompt` only when it needs the history, retrieving with the raw question
+    in the meantime.
+    """
+    if "input" not in prompt.input_variables:
+        raise ValueError(
+            f"Expected `input` to be a prompt variable, got {prompt.input_variables}"
+        )
+    rephrase = prompt | llm | StrOutputParser()
+
+    def retrieve(inputs: dict[str, Any], config: RunnableConfig) -> list[Document]:
+        question: str = inputs["input"]
+        if not needs_rewrite(question, inputs.get("chat_history") or []):
+            return retriever.invoke(question, config)
+
+        with get_executor_for_config(config) as executor:
+            speculative = executor.submit(retriever.invoke, question, config)
+            rewritten = rephrase.invoke(inputs, config)
+            if similarity(question, rewritten) >= SAME_QUESTION:
+                return speculative.result()
+            return retriever.invoke(rewritten, config)
+
+    return RunnableLambda(retrieve).with_config(run_name="speculative_retriever")
@@ -2,7 +2,12 @@ from langchain.agents import AgentExecutor, create_tool_calling_agent, tool
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_ollama import ChatOllama
 
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+from src.common.tool_executor import ToolExecutor, pure
 
+
+@pure
 @tool
 def add(a: int, b: int) -> int:
     """Add two numbers."""
@@ -10,6 +15,7 @@ def add(a: int, b: int) -> int:
     return a + b
 
 
+@pure
 @tool
 def subtract(a: int, b: int) -> int:
     """Subtract two numbers."""
@@ -17,6 +23,7 @@ def subtract(a: int, b: int) -> int:
     return a - b
 
 
+@pure
 @tool
 def multiply(a: int, b: int) -> int:
     """Multiply two numbers."""
@@ -24,6 +31,7 @@ def multiply(a: int, b: int) -> int:
     return a * b
 
 
+@pure
 @tool
 def divide(a: int, b: int) -> int:
     """Divide two numbers."""
@@ -31,9 +39,16 @@ def divide(a: int, b: int) -> int:
     return a / b
 
 
+# Shared by every call, so that repeated calls with the same numbers are answered
+# from the executor cache.
+tool_executor = ToolExecutor([add, subtract, multiply, divide], default_timeout=10)
+tools = tool_executor.as_tools()
+
+
 def basic_math_agent(input: str) -> str:
-    llm = ChatOllama(model="mistral-nemo:12b")
-    tools = [add, subtract, multiply, divide]
+    llm = ChatOllama(
+        model="mistral-nemo:12b", cache=llm_cache(), callbacks=telemetry_callbacks()
+    )
     prompt = ChatPromptTemplate.from_messages(
         [
             ("system", "You are a helpful assistant"),
@@ -46,7 +61,9 @@ def basic_math_agent(input: str) -> str:
     agent = create_tool_calling_agent(llm=llm, tools=tools, prompt=prompt)
     agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
 
-    return agent_executor.invoke({"input": input}).get("output")
+    return agent_executor.invoke(
+        {"input": input}, config={"callbacks": telemetry_callbacks()}
+    ).get("output")
 
 
 if __name__ == "__main__":
@@ -4,9 +4,17 @@ from langchain.agents import AgentExecutor, AgentType
 from langchain_experimental.agents import create_csv_agent
 from langchain_ollama import ChatOllama
 
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+
 
 def csv_agent(input: str) -> AgentExecutor:
-    llm = ChatOllama(model="deepseek-r1:8b", temperature=0)
+    llm = ChatOllama(
+        model="deepseek-r1:8b",
+        temperature=0,
+        cache=llm_cache(),
+        callbacks=telemetry_callbacks(),
+    )
 
     current_dir = os.path.dirname(os.path.abspath(__file__))
     path = os.path.join(current_dir, "./files/game_of_thrones_episodes_data.csv")
@@ -22,7 +30,9 @@ def csv_agent(input: str) -> AgentExecutor:
         },
     )
 
-    return agent_executor.invoke({"input": input})
+    return agent_executor.invoke(
+        {"input": input}, config={"callbacks": telemetry_callbacks()}
+    )
 
 
 _questions = [
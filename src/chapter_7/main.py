@@ -1,4 +1,5 @@
 from src.chapter_7.router_agent import router_agent
+from src.common.telemetry import telemetry_callbacks
 
 python_agent_input = """
 - Generate and save in the current working directory 15 QR codes that point to https://www.robertmolina.dev.
@@ -10,7 +11,9 @@ python_agent_input = """
 
 def main():
     question = input("Enter a question: ")
-    router_agent().invoke({"input": question})
+    router_agent().invoke(
+        {"input": question}, config={"callbacks": telemetry_callbacks()}
+    )
 
 
 if __name__ == "__main__":
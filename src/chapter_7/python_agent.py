@@ -3,6 +3,9 @@ from langchain.agents import AgentExecutor, create_react_agent
 from langchain_experimental.tools.python.tool import PythonREPLTool
 from langchain_ollama import ChatOllama
 
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+
 instructions = """
 - You are an agent designed to write and execute python code to answer questions.
 - **IMPORTANT:** You must follow the RAG format or else you will run into output parsing errors.
@@ -16,7 +19,12 @@ instructions = """
 def python_agent(question: str) -> AgentExecutor:
     base_prompt = hub.pull("langchain-ai/react-agent-template")
 
-    llm = ChatOllama(model="codestral", temperature=0)
+    llm = ChatOllama(
+        model="codestral",
+        temperature=0,
+        cache=llm_cache(),
+        callbacks=telemetry_callbacks(),
+    )
     prompt = base_prompt.partial(instructions=instructions)
     tools = [PythonREPLTool()]
 
@@ -30,7 +38,9 @@ def python_agent(question: str) -> AgentExecutor:
         agent=agent, tools=tools, verbose=True, handle_parsing_errors=True
     )
 
-    return agent_executor.invoke({"input": question})
+    return agent_executor.invoke(
+        {"input": question}, config={"callbacks": telemetry_callbacks()}
+    )
 
 
 _input = """
@@ -5,6 +5,8 @@ from langchain_ollama import ChatOllama
 from src.chapter_7.basic_math_agent import basic_math_agent
 from src.chapter_7.csv_agent import csv_agent
 from src.chapter_7.python_agent import python_agent
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
 
 instructions = """
 - You are a a router agent that can route questions to the appropriate agent.
@@ -30,7 +32,12 @@ Use when transforming natural language into python code and executing it, return
 def router_agent() -> AgentExecutor:
     base_prompt = hub.pull("langchain-ai/react-agent-template")
 
-    llm = ChatOllama(model="llama3.2:3b", temperature=0)
+    llm = ChatOllama(
+        model="llama3.2:3b",
+        temperature=0,
+        cache=llm_cache(),
+        callbacks=telemetry_callbacks(),
+    )
     prompt = base_prompt.partial(instructions=instructions)
     tools = [
         Tool(
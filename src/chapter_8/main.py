@@ -4,6 +4,7 @@ from langchain_core.messages import HumanMessage
 from langgraph.graph import END, MessagesState, StateGraph
 
 from src.chapter_8.nodes import reason, tool_node
+from src.common.telemetry import telemetry_callbacks
 
 AGENT_REASON = "agent_reason"
 ACT = "act"
@@ -51,6 +52,7 @@ if __name__ == "__main__":
                     content="What is the weather in Tokyo? List it, then triple it."
                 )
             ]
-        }
+        },
+        config={"callbacks": telemetry_callbacks()},
     )
     print(result.get("messages")[LAST].content)
@@ -2,6 +2,9 @@ from langchain_core.tools import tool
 from langchain_ollama import ChatOllama
 from langchain_tavily import TavilySearch
 
+from src.common.llm_cache import llm_cache
+from src.common.telemetry import telemetry_callbacks
+
 
 @tool
 def triple(number: float) -> float:
@@ -13,4 +16,9 @@ def triple(number: float) -> float:
 
 tools = [TavilySearch(max_results=1), triple]
 
-llm = ChatOllama(model="llama3.1:8b", temperature=0).bind_tools(tools)
+llm = ChatOllama(
+    model="llama3.1:8b",
+    temperature=0,
+    cache=llm_cache(),
+    callbacks=telemetry_callbacks(),
+).bind_tools(tools)
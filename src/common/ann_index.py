@@ -0,0 +1,244 @@
+"""
+Configurable approximate nearest neighbor indexes for the FAISS vector stores.
+
+`FAISS.from_documents` always builds an exact `IndexFlatL2`, whose query cost grows
+linearly with the corpus. `IndexSpec` describes one of the index types below, built
+with `faiss.index_factory` and trained on a sample of the vectors:
+
+- `flat`: exact search (the default).
+- `ivf_flat`: inverted lists over `nlist` clusters, `nprobe` of them searched.
+- `hnsw`: graph index with `hnsw_m` neighbors per node, `ef_search` candidates.
+- `ivf_pq`: inverted lists with product-quantized vectors (`pq_m` bytes per vector).
+
+The search parameters are stored in the saved index. Note that only flat indexes
+support deleting vectors from a vector store, the approximate ones can only be
+rebuilt from scratch.
+
+Usage:
+    python -m src.common.ann_index --index chapter_6_faiss_index --k 4
+    python -m src.common.ann_index --synthetic 100000 --types ivf_flat hnsw --nprobe 8 32
+"""
+
+import argparse
+import math
+import time
+from dataclasses import dataclass
+
+import faiss
+import numpy
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+
+@dataclass
+class IndexSpec:
+    """Type and parameters of a FAISS index."""
+
+    kind: str = "flat"
+    # Number of IVF clusters, by default 4 * sqrt(number of training vectors).
+    nlist: int | None = None
+    nprobe: int | None = None
+    hnsw_m: int = 32
+    ef_search: int = 64
+    pq_m: int = 16
+    # Number of vectors the IVF indexes are trained on.
+    train_size: int = 20_000
+
+    def __post_init__(self) -> None:
+        if self.kind not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type {self.kind!r}, use one of {INDEX_TYPES}"
+            )
+
+    @property
+    def needs_training(self) -> bool:
+        return self.kind in ("ivf_flat", "ivf_pq")
+
+    def factory_string(self, dimension: int, training_size: int) -> str:
+        """The `faiss.index_factory` description of the index."""
+        # IVF needs about 39 training vectors per cluster.
+        nlist = self.nlist or round(4 * math.sqrt(training_size))
+        nlist = max(1, min(nlist, training_size // 39))
+        if self.kind == "ivf_flat":
+            return f"IVF{nlist},Flat"
+        if self.kind == "ivf_pq":
+            if dimension % self.pq_m:
+                raise ValueError(f"pq_m={self.pq_m} must divide dimension {dimension}")
+            # 8-bit codes need 256 training vectors per sub-quantizer centroid set.
+            nbits = max(1, min(8, int(math.log2(max(2, training_size // 39)))))
+            return f"IVF{nlist},PQ{self.pq_m}x{nbits}"
+        if self.kind == "hnsw":
+            return f"HNSW{self.hnsw_m}"
+        return "Flat"
+
+    def build(self, training_vectors: numpy.ndarray) -> faiss.Index:
+        """Create the index, trained on `training_vectors` when it needs it."""
+        training_vectors = numpy.ascontiguousarray(
+            training_vectors, dtype=numpy.float32
+        )
+        size, dimension = training_vectors.shape
+        index = faiss.index_factory(dimension, self.factory_string(dimension, size))
+        if not index.is_trained:
+            index.train(training_vectors)
+
+        parameters = faiss.ParameterSpace()
+        if self.needs_training:
+            nlist = faiss.extract_index_ivf(index).nlist
+            nprobe = self.nprobe or min(nlist, max(8, nlist // 16))
+            parameters.set_index_parameter(index, "nprobe", nprobe)
+        elif self.kind == "hnsw":
+            parameters.set_index_parameter(index, "efSearch", self.ef_search)
+        return index
+
+    def empty_store(
+        self, embeddings: Embeddings, training_vectors: numpy.ndarray
+    ) -> FAISS:
+        """An empty vector store backed by a trained index of this type."""
+        return FAISS(
+            embedding_function=embeddings,
+            index=self.build(training_vectors),
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+        )
+
+
+def supports_deletion(index: faiss.Index) -> bool:
+    """
+    Whether `FAISS.delete` works on the index. It renumbers the remaining vectors
+    0..n-1, which only matches what a flat index does when removing vectors: IVF
+    indexes keep the ids of the remaining vectors and HNSW graphs cannot remove any.
+    """
+    return isinstance(index, faiss.IndexFlat)
+
+
+def add_index_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the index type options to an ingestion script."""
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--nlist", type=int, help="IVF clusters")
+    parser.add_argument("--nprobe", type=int, help="IVF clusters searched")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--pq-m", type=int, default=16)
+    parser.add_argument("--train-size", type=int, default=20_000)
+
+
+def index_spec_from_args(args: argparse.Namespace) -> IndexSpec:
+    return IndexSpec(
+        kind=args.index_type,
+        nlist=args.nlist,
+        nprobe=args.nprobe,
+        hnsw_m=args.hnsw_m,
+        ef_search=args.ef_search,
+        pq_m=args.pq_m,
+        train_size=args.train_size,
+    )
+
+
+def load_vectors(index_path: str) -> numpy.ndarray:
+    """Read back the vectors of a saved flat FAISS index."""
+    index = faiss.read_index(f"{index_path}/index.faiss")
+    vectors: numpy.ndarray = index.reconstruct_n(0, index.ntotal)
+    return vectors
+
+
+def benchmark(
+    vectors: numpy.ndarray,
+    queries: numpy.ndarray,
+    spec: IndexSpec,
+    k: int,
+    exact: numpy.ndarray,
+) -> dict[str, float]:
+    """Build an index for `spec` and measure recall@k, latency and size."""
+    started = time.perf_counter()
+    sample = vectors[numpy.random.default_rng(0).permutation(len(vectors))]
+    index = spec.build(sample[: spec.train_size])
+    index.add(vectors)
+    build_seconds = time.perf_counter() - started
+
+    latencies = []
+    found = []
+    for query in queries:
+        started = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - started)
+        found.append(ids[0])
+
+    recall = numpy.mean(
+        [
+            len(set(result) & set(expected)) / k
+            for result, expected in zip(found, exact, strict=True)
+        ]
+    )
+    return {
+        "recall": float(recall),
+        "p50_ms": float(numpy.percentile(latencies, 50) * 1000),
+        "p99_ms": float(numpy.percentile(latencies, 99) * 1000),
+        "size_mb": faiss.serialize_index(index).nbytes / 1e6,
+        "build_s": build_seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare recall@k, latency and size of FAISS index types."
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--index", help="Saved flat index to take the vectors from")
+    source.add_argument("--synthetic", type=int, help="Number of random vectors")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=INDEX_TYPES)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[None])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[64])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--train-size", type=int, default=20_000)
+    parser.add_argument("--pq-m", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = numpy.random.default_rng(0)
+    if args.index:
+        vectors = load_vectors(args.index)
+    else:
+        # Clustered data is closer to real embeddings than uniform noise.
+        centers = rng.normal(size=(max(1, args.synthetic // 1000), args.dimension))
+        vectors = centers[rng.integers(len(centers), size=args.synthetic)]
+        vectors += rng.normal(scale=0.3, size=vectors.shape)
+    vectors = numpy.ascontiguousarray(vectors, dtype=numpy.float32)
+
+    # Queries are perturbed corpus vectors, answered exactly by a flat index.
+    queries = vectors[rng.integers(len(vectors), size=args.queries)]
+    queries = queries + rng.normal(scale=0.05, size=queries.shape).astype(numpy.float32)
+    exact_index = faiss.IndexFlatL2(vectors.shape[1])
+    exact_index.add(vectors)
+    _, exact = exact_index.search(queries, args.k)
+
+    print(f"{len(vectors)} vectors of dimension {vectors.shape[1]}, k={args.k}\n")
+    print(
+        f"{'index':<10} {'params':<14} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'size MB':>8} {'build s':>8}"
+    )
+    for kind in args.types:
+        if kind in ("ivf_flat", "ivf_pq"):
+            variants = [(f"nprobe={n or 'auto'}", {"nprobe": n}) for n in args.nprobe]
+        elif kind == "hnsw":
+            variants = [(f"efSearch={e}", {"ef_search": e}) for e in args.ef_search]
+        else:
+            variants = [("", {})]
+
+        for label, params in variants:
+            spec = IndexSpec(
+                kind=kind, train_size=args.train_size, pq_m=args.pq_m, **params
+            )
+            result = benchmark(vectors, queries, spec, args.k, exact)
+            print(
+                f"{kind:<10} {label:<14} {result['recall']:>7.3f} "
+                f"{result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} "
+                f"{result['size_mb']:>8.1f} {result['build_s']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
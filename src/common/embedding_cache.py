@@ -0,0 +1,215 @@
+"""
+Content-addressed on-disk cache for document embeddings.
+
+Vectors are keyed on (model, sha256(chunk text)) and stored as rows of a
+memory-mapped float32 file, with a SQLite table mapping each key to its row. Only the
+chunks that are missing from the store are sent to the embeddings model, so
+re-ingesting a mostly unchanged corpus is a matter of reading vectors from disk.
+
+Settings:
+    EMBEDDING_CACHE_DIR: Directory of the store (default `.embedding_cache`).
+
+Usage:
+    embeddings = cached_embeddings("nomic-embed-text")
+    FAISS.from_documents(docs, embeddings)
+    print(embeddings.stats())
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections.abc import Iterable
+
+import numpy
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import OllamaEmbeddings
+
+DEFAULT_CACHE_DIR = ".embedding_cache"
+
+
+def content_key(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only float32 vector file with a SQLite offset index, one per model.
+    """
+
+    def __init__(self, directory: str, model: str) -> None:
+        self.model = model
+        os.makedirs(directory, exist_ok=True)
+        file_name = re.sub(r"[^\w.-]", "_", model)
+        self.vectors_path = os.path.join(directory, f"{file_name}.f32")
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(directory, f"{file_name}.sqlite"), check_same_thread=False
+        )
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    row INTEGER NOT NULL,
+                    PRIMARY KEY (model, key)
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)"
+            )
+
+        meta = dict(self._connection.execute("SELECT name, value FROM meta"))
+        self.dimension: int | None = (
+            int(meta["dimension"]) if "dimension" in meta else None
+        )
+        # Number of rows of the vector file that are indexed.
+        self.rows = int(meta.get("rows", 0))
+        self._vectors: numpy.memmap | None = None
+
+        # Drop vectors written by a run that crashed before indexing them.
+        if os.path.exists(self.vectors_path) and self.dimension:
+            size = self.rows * self.dimension * 4
+            if os.path.getsize(self.vectors_path) > size:
+                os.truncate(self.vectors_path, size)
+
+    def _mapped(self) -> numpy.memmap:
+        """The vector file mapped as a (rows, dimension) array."""
+        if self._vectors is None or len(self._vectors) < self.rows:
+            self._vectors = numpy.memmap(
+                self.vectors_path,
+                dtype=numpy.float32,
+                mode="r",
+                shape=(self.rows, self.dimension or 0),
+            )
+        return self._vectors
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, list[float]]:
+        """The stored vectors of the given content keys that are present."""
+        keys = list(set(keys))
+        rows: dict[str, int] = {}
+        with self._lock:
+            # Stay below SQLite's limit on the number of query parameters.
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                rows.update(
+                    self._connection.execute(
+                        "SELECT key, row FROM embeddings WHERE model = ? AND key IN "
+                        f"({', '.join('?' * len(batch))})",
+                        (self.model, *batch),
+                    ).fetchall()
+                )
+            if not rows:
+                return {}
+            vectors = self._mapped()
+            return {key: vectors[row].tolist() for key, row in rows.items()}
+
+    def put_many(self, vectors: dict[str, list[float]]) -> None:
+        """Append new vectors to the file, then index them."""
+        if not vectors:
+            return
+
+        array = numpy.asarray(list(vectors.values()), dtype=numpy.float32)
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = array.shape[1]
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT INTO meta (name, value) VALUES ('dimension', ?)",
+                        (str(self.dimension),),
+                    )
+            elif array.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Expected {self.dimension}-dimensional vectors for "
+                    f"{self.model}, got {array.shape[1]}"
+                )
+
+            # The vectors hit the disk before the index points at them.
+            with open(self.vectors_path, "ab") as f:
+                f.write(array.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, key, row) "
+                    "VALUES (?, ?, ?)",
+                    (
+                        (self.model, key, self.rows + offset)
+                        for offset, key in enumerate(vectors)
+                    ),
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES ('rows', ?)",
+                    (str(self.rows + len(vectors)),),
+                )
+            self.rows += len(vectors)
+
+    def __len__(self) -> int:
+        return self.rows
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that only send the chunks missing from an `EmbeddingStore` to the
+    underlying model. Queries are not cached.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, store: EmbeddingStore, batch_size: int = 256
+    ) -> None:
+        self.embeddings = embeddings
+        self.store = store
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [content_key(text) for text in texts]
+        vectors = self.store.get_many(keys)
+
+        # Duplicate chunks are only embedded once.
+        missing = {
+            key: text
+            for key, text in zip(keys, texts, strict=True)
+            if key not in vectors
+        }
+        hits = sum(key in vectors for key in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = dict(pending[start : start + self.batch_size])
+            embedded = self.embeddings.embed_documents(list(batch.values()))
+            new_vectors = dict(zip(batch, embedded, strict=True))
+            self.store.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "stored_vectors": len(self.store),
+        }
+
+
+def cached_embeddings(model: str, directory: str | None = None) -> CachedEmbeddings:
+    """Ollama embeddings backed by the on-disk embedding store."""
+    path = directory or os.getenv("EMBEDDING_CACHE_DIR") or DEFAULT_CACHE_DIR
+    return CachedEmbeddings(OllamaEmbeddings(model=model), EmbeddingStore(path, model))
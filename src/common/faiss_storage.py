@@ -0,0 +1,188 @@
+"""
+Pickle-free storage for FAISS vector stores.
+
+`FAISS.save_local` pickles the docstore next to the index, so loading it requires
+`allow_dangerous_deserialization=True` and reads every document and vector into the
+memory of each process. `save_index` writes the index with `faiss.write_index` and
+the documents to a SQLite table instead. `load_index` maps the index file into memory
+read-only and fetches the documents of the search results from SQLite by position,
+so loading takes milliseconds and serving processes share the index pages through
+the OS page cache.
+
+Files are written to temporary paths and renamed into place, so processes that have
+the previous index mapped keep reading a consistent copy.
+
+Usage:
+    save_index(vectorstore, "chapter_5_faiss_index")
+    vectorstore = load_index("chapter_5_faiss_index", embeddings)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator, Mapping
+from typing import cast
+
+import faiss
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Read-only docstore that looks documents up in SQLite, by id or by the position
+    of their vector in the index.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+
+    def _fetch_one(self, query: str, parameter: int | str) -> tuple[str, ...] | None:
+        with self._lock:
+            row: tuple[str, ...] | None = self._connection.execute(
+                query, (parameter,)
+            ).fetchone()
+        return row
+
+    def search(self, search: str) -> str | Document:
+        row = self._fetch_one(
+            "SELECT id, page_content, metadata FROM documents WHERE id = ?", search
+        )
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=row[0], page_content=row[1], metadata=json.loads(row[2]))
+
+    def documents(self) -> Iterator[Document]:
+        """Every document, in the order of their vectors."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, page_content, metadata FROM documents ORDER BY position"
+            ).fetchall()
+        for row in rows:
+            yield Document(id=row[0], page_content=row[1], metadata=json.loads(row[2]))
+
+    def id_at(self, position: int) -> str | None:
+        row = self._fetch_one("SELECT id FROM documents WHERE position = ?", position)
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            count: int = self._connection.execute(
+                "SELECT COUNT(*) FROM documents"
+            ).fetchone()[0]
+        return count
+
+
+class SQLiteIndexToId(Mapping[int, str]):
+    """
+    The position to document id mapping of a `SQLiteDocstore`, in place of the
+    `index_to_docstore_id` dictionary of the vector store.
+    """
+
+    def __init__(self, docstore: SQLiteDocstore) -> None:
+        self.docstore = docstore
+
+    def __getitem__(self, position: int) -> str:
+        document_id = self.docstore.id_at(int(position))
+        if document_id is None:
+            raise KeyError(position)
+        return document_id
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.docstore)
+
+
+def save_index(vectorstore: FAISS, path: str) -> None:
+    """Write the index and its documents to the directory `path`."""
+    os.makedirs(path, exist_ok=True)
+    index_path = os.path.join(path, INDEX_FILE)
+    docstore_path = os.path.join(path, DOCSTORE_FILE)
+
+    faiss.write_index(vectorstore.index, f"{index_path}.tmp")
+
+    if os.path.exists(f"{docstore_path}.tmp"):
+        os.remove(f"{docstore_path}.tmp")
+    connection = sqlite3.connect(f"{docstore_path}.tmp")
+    try:
+        with connection:
+            connection.execute(
+                """
+                CREATE TABLE documents (
+                    position INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    page_content TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+                """
+            )
+            connection.executemany(
+                "INSERT INTO documents VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        position,
+                        document_id,
+                        doc.page_content,
+                        json.dumps(doc.metadata, default=str),
+                    )
+                    for position, document_id, doc in _documents(vectorstore)
+                ),
+            )
+    finally:
+        connection.close()
+
+    # Processes that load the index between the two renames pair it with the
+    # previous docstore, saves are meant to happen between deployments.
+    os.replace(f"{index_path}.tmp", index_path)
+    os.replace(f"{docstore_path}.tmp", docstore_path)
+
+
+def _documents(vectorstore: FAISS) -> Iterator[tuple[int, str, Document]]:
+    for position, document_id in sorted(vectorstore.index_to_docstore_id.items()):
+        doc = vectorstore.docstore.search(document_id)
+        if not isinstance(doc, Document):
+            raise ValueError(f"Could not find document for id {document_id}")
+        yield position, document_id, doc
+
+
+def index_exists(path: str) -> bool:
+    return os.path.exists(os.path.join(path, INDEX_FILE)) and os.path.exists(
+        os.path.join(path, DOCSTORE_FILE)
+    )
+
+
+def load_index(path: str, embeddings: Embeddings, mmap: bool = True) -> FAISS:
+    """
+    Load an index saved by `save_index`. With `mmap`, the index is memory-mapped
+    read-only and documents are fetched lazily; otherwise the index and documents
+    are read into memory and can be updated.
+    """
+    index_path = os.path.join(path, INDEX_FILE)
+    docstore = SQLiteDocstore(os.path.join(path, DOCSTORE_FILE))
+    if mmap:
+        index = faiss.read_index(
+            index_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+        )
+        # FAISS only subscripts the mapping when searching a read-only store.
+        index_to_id = cast(dict[int, str], SQLiteIndexToId(docstore))
+        return FAISS(embeddings, index, docstore, index_to_id)
+
+    documents = {doc.id: doc for doc in docstore.documents() if doc.id}
+    return FAISS(
+        embeddings,
+        faiss.read_index(index_path),
+        InMemoryDocstore(documents),
+        dict(enumerate(documents)),
+    )
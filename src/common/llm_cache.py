@@ -0,0 +1,225 @@
+"""
+Persistent exact-match cache for LLM responses.
+
+Every `ChatOllama` in the repo is created with `cache=llm_cache()`. Setting the
+`LLM_CACHE_PATH` environment variable to a SQLite file enables the cache for all of
+them; leaving it unset keeps the default (uncached) behavior.
+
+Settings:
+    LLM_CACHE_PATH: SQLite file used to store the responses.
+    LLM_CACHE_MAX_ENTRIES: Maximum number of responses kept (default 10000).
+    LLM_CACHE_TTL_SECONDS: Time to live of a response (default one week).
+
+Usage:
+    python -m src.common.llm_cache            # Print the size and hit/miss counts
+    python -m src.common.llm_cache --clear    # Remove every cached response
+"""
+
+import argparse
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    SQLite-backed LLM cache with LRU eviction, a TTL and hit/miss counters.
+
+    Entries are keyed on the LLM string (model name and parameters) and the
+    rendered prompt or serialized messages. The counters are stored next to the
+    entries, so they add up across processes and runs.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float | None = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                llm_string TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at "
+            "ON llm_cache (accessed_at)"
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        """Add to a persisted counter. The caller holds the lock and commits."""
+        self._connection.execute(
+            "INSERT INTO llm_cache_stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """
+        Look up a cached response, refreshing its LRU position on a hit.
+        """
+        key = self._key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._count("misses")
+                self._connection.commit()
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._count("misses")
+                self._connection.commit()
+                return None
+
+            self._connection.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._count("hits")
+            self._connection.commit()
+
+        generations: RETURN_VAL_TYPE = loads(value)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """
+        Store a response, evicting the least recently used entries when full.
+        """
+        key = self._key(prompt, llm_string)
+        value = dumps(list(return_val))
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(key, llm_string, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, llm_string, value, now, now),
+            )
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM llm_cache"
+            ).fetchone()
+            if count > self.max_entries:
+                overflow = count - self.max_entries
+                self._connection.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._count("evictions", overflow)
+            self._connection.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """
+        Remove every cached response.
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM llm_cache")
+            self._connection.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the hit/miss counters of every run and the size of the cache.
+        """
+        with self._lock:
+            (entries,) = self._connection.execute(
+                "SELECT COUNT(*) FROM llm_cache"
+            ).fetchone()
+            counters = dict(
+                self._connection.execute("SELECT name, value FROM llm_cache_stats")
+            )
+
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+@functools.cache
+def llm_cache() -> SQLiteLLMCache | None:
+    """
+    Return the process-wide LLM cache, or None when `LLM_CACHE_PATH` is not set.
+    """
+    path = os.getenv("LLM_CACHE_PATH")
+    if not path:
+        return None
+
+    ttl_seconds = float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    return SQLiteLLMCache(
+        path=path,
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        ttl_seconds=ttl_seconds if ttl_seconds > 0 else None,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect the persistent LLM cache.")
+    parser.add_argument("--clear", action="store_true", help="Remove every entry")
+    args = parser.parse_args()
+
+    cache = llm_cache()
+    if cache is None:
+        print("LLM_CACHE_PATH is not set, the LLM cache is disabled.")
+        return
+
+    if args.clear:
+        cache.clear()
+
+    stats = cache.stats()
+    print(f"Path: {cache.path}")
+    print(f"Entries: {stats['entries']} (max {cache.max_entries})")
+    print(
+        f"Hits: {stats['hits']}, misses: {stats['misses']} "
+        f"(hit rate {stats['hit_rate']:.1%}), evictions: {stats['evictions']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
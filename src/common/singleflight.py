@@ -0,0 +1,58 @@
+"""
+Duplicate call suppression for concurrent work on the same key.
+"""
+
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+
+
+class SingleFlight[K: Hashable, V]:
+    """
+    Ensure that only one call per key is in flight at a time.
+
+    Concurrent callers asking for the same key wait for the first caller's result
+    (or exception) instead of repeating the work.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.shared = 0
+
+        self._lock = threading.Lock()
+        self._in_flight: dict[K, Future[V]] = {}
+
+    def do(self, key: K, function: Callable[[], V]) -> V:
+        """
+        Run `function` for `key`, or wait for the call already running for it.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(function())
+        except BaseException as error:
+            future.set_exception(error)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+        return future.result()
+
+    def in_flight(self) -> int:
+        """
+        Return the number of keys currently being computed.
+        """
+        with self._lock:
+            return len(self._in_flight)
@@ -0,0 +1,138 @@
+"""
+Bounded-memory streaming ingestion into a FAISS index.
+
+Instead of materializing every loaded document, every chunk and every embedding
+before building the index, chunks flow through a generator pipeline: they are
+embedded in fixed-size batches and added to the index with `add_embeddings` one batch
+at a time, and the index is saved every few batches. Only one batch of chunks and
+vectors is held in memory on top of the index itself.
+
+With an `IndexSpec` of a type that needs training (IVF), the first `train_size`
+vectors are buffered, the index is trained on them, and the following batches are
+streamed as usual. Only a flat index can replace the vectors of ids it already
+holds (see `supports_deletion`).
+
+Usage:
+    chunks = iter_split(loader.lazy_load(), text_splitter)
+    vectorstore = ingest_documents(chunks, embeddings, checkpoint=save)
+"""
+
+import resource
+import sys
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from itertools import batched
+from typing import Any
+
+import numpy
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import TextSplitter
+
+from src.common.ann_index import IndexSpec, supports_deletion
+
+# Texts, vectors, metadatas and ids of a batch of documents.
+type Batch = tuple[list[str], list[list[float]], list[dict[str, Any]], list[str]]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def iter_split(
+    docs: Iterable[Document], text_splitter: TextSplitter
+) -> Iterator[Document]:
+    """Split documents one at a time as they are loaded."""
+    for doc in docs:
+        yield from text_splitter.split_documents([doc])
+
+
+def ingest_documents(
+    docs: Iterable[Document],
+    embeddings: Embeddings,
+    vectorstore: FAISS | None = None,
+    batch_size: int = 256,
+    checkpoint: Callable[[FAISS], None] | None = None,
+    checkpoint_every: int = 20,
+    index_spec: IndexSpec | None = None,
+) -> FAISS | None:
+    """
+    Embed the documents in batches and add them to the index incrementally.
+
+    Documents keep their `id` as vector id, replacing the vectors already stored
+    under the same id, so an interrupted run can be resumed. Raises ValueError when
+    the index cannot delete those vectors. `checkpoint` is called
+    with the index every `checkpoint_every` batches and once at the end. A new index
+    is built according to `index_spec`, exact by default.
+    Returns None when there was nothing to index.
+    """
+    index_spec = index_spec or IndexSpec()
+    # Batches held back until there are enough vectors to train a new index on.
+    pending: list[Batch] = []
+    # Whether the last checkpoint has everything added so far.
+    saved = True
+    for count, batch in enumerate(batched(docs, batch_size, strict=False), start=1):
+        texts = [doc.page_content for doc in batch]
+        metadatas = [doc.metadata for doc in batch]
+        ids = [doc.id or uuid.uuid4().hex for doc in batch]
+        vectors = embeddings.embed_documents(texts)
+
+        if vectorstore is None:
+            pending.append((texts, vectors, metadatas, ids))
+            buffered = sum(len(texts) for texts, *_ in pending)
+            if index_spec.needs_training and buffered < index_spec.train_size:
+                continue
+            vectorstore = _create_store(embeddings, index_spec, pending)
+            pending = []
+        else:
+            existing = [
+                vector_id
+                for vector_id in ids
+                if isinstance(vectorstore.docstore.search(vector_id), Document)
+            ]
+            if existing:
+                if not supports_deletion(vectorstore.index):
+                    raise ValueError(
+                        f"The index already holds {len(existing)} of the ids and "
+                        "cannot replace their vectors, rebuild it from scratch"
+                    )
+                vectorstore.delete(existing)
+            vectorstore.add_embeddings(
+                zip(texts, vectors, strict=True), metadatas, ids=ids
+            )
+
+        saved = False
+        if checkpoint is not None and count % checkpoint_every == 0:
+            checkpoint(vectorstore)
+            saved = True
+
+    if pending:
+        vectorstore = _create_store(embeddings, index_spec, pending)
+        saved = False
+    if checkpoint is not None and vectorstore is not None and not saved:
+        checkpoint(vectorstore)
+    return vectorstore
+
+
+def _create_store(
+    embeddings: Embeddings,
+    index_spec: IndexSpec,
+    batches: list[Batch],
+) -> FAISS:
+    """Build a new index from the first batches, training it on their vectors."""
+    texts = [text for batch in batches for text in batch[0]]
+    vectors = [vector for batch in batches for vector in batch[1]]
+    metadatas = [metadata for batch in batches for metadata in batch[2]]
+    ids = [vector_id for batch in batches for vector_id in batch[3]]
+
+    if index_spec.kind == "flat":
+        return FAISS.from_embeddings(
+            zip(texts, vectors, strict=True), embeddings, metadatas, ids=ids
+        )
+    vectorstore = index_spec.empty_store(embeddings, numpy.asarray(vectors))
+    vectorstore.add_embeddings(zip(texts, vectors, strict=True), metadatas, ids=ids)
+    return vectorstore
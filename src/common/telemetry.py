@@ -0,0 +1,373 @@
+"""
+Structured performance telemetry for LLM, tool and chain runs.
+
+`TelemetryCallbackHandler` records one `RunRecord` per run with its wall time,
+time-to-first-token, prompt and completion token counts, tokens/sec and the
+parent/child run ids. Records are appended to a JSONL file by a background thread
+and aggregated into counters exposed in the Prometheus text format, so the callbacks
+themselves only do a few dict operations and never print.
+
+Every `ChatOllama` in the repo is created with `callbacks=telemetry_callbacks()`, and
+chains, agents and tools are invoked with `config={"callbacks": telemetry_callbacks()}`
+so that their runs, and the runs nested in them, are recorded too. Like
+the LLM cache, telemetry is disabled unless one of the settings below is set.
+
+Settings:
+    TELEMETRY_PATH: JSONL file the run records are appended to.
+    TELEMETRY_METRICS_PORT: Port of the Prometheus text endpoint (`GET /metrics`).
+"""
+
+import atexit
+import functools
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+LLM = "llm"
+TOOL = "tool"
+CHAIN = "chain"
+
+# Prometheus type of each metric family, the summaries made of `_sum` and `_count`.
+METRIC_TYPES = {
+    "runs_total": "counter",
+    "run_duration_seconds": "summary",
+    "time_to_first_token_seconds": "summary",
+    "tokens_total": "counter",
+}
+
+
+@dataclass
+class RunRecord:
+    """Performance numbers of a finished run."""
+
+    run_id: str
+    parent_run_id: str | None
+    kind: str
+    name: str
+    started_at: float
+    wall_seconds: float
+    ttft_seconds: float | None = None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    tokens_per_second: float | None = None
+    error: str | None = None
+
+
+@dataclass
+class _ActiveRun:
+    kind: str
+    name: str
+    parent_run_id: UUID | None
+    started_at: float
+    started: float
+    first_token: float | None = None
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    Record the performance of every run to JSONL and Prometheus counters.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._runs: dict[UUID, _ActiveRun] = {}
+        # (metric, labels) -> value
+        self._metrics: defaultdict[tuple[str, tuple[tuple[str, str], ...]], float] = (
+            defaultdict(float)
+        )
+
+        self._records: queue.SimpleQueue[RunRecord | None] = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+        if path:
+            self._writer = threading.Thread(
+                target=self._write_records, name="telemetry-writer", daemon=True
+            )
+            self._writer.start()
+
+    def _start(
+        self,
+        kind: str,
+        name: str,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+    ) -> None:
+        self._runs[run_id] = _ActiveRun(
+            kind=kind,
+            name=name,
+            parent_run_id=parent_run_id,
+            started_at=time.time(),
+            started=time.perf_counter(),
+        )
+
+    def _end(
+        self,
+        run_id: UUID,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+
+        now = time.perf_counter()
+        ttft = run.first_token - run.started if run.first_token else None
+        # Generation speed is measured after the first token when streaming.
+        generation_seconds = now - (run.first_token or run.started)
+        record = RunRecord(
+            run_id=str(run_id),
+            parent_run_id=str(run.parent_run_id) if run.parent_run_id else None,
+            kind=run.kind,
+            name=run.name,
+            started_at=run.started_at,
+            wall_seconds=now - run.started,
+            ttft_seconds=ttft,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_per_second=(
+                completion_tokens / generation_seconds
+                if completion_tokens and generation_seconds > 0
+                else None
+            ),
+            error=f"{type(error).__name__}: {error}" if error else None,
+        )
+        self._observe(record)
+        if self._writer is not None:
+            self._records.put(record)
+
+    def _observe(self, record: RunRecord) -> None:
+        labels = (("kind", record.kind), ("name", record.name))
+        status = (("status", "error" if record.error else "ok"),)
+        with self._lock:
+            self._metrics[("runs_total", labels + status)] += 1
+            self._metrics[("run_duration_seconds_sum", labels)] += record.wall_seconds
+            self._metrics[("run_duration_seconds_count", labels)] += 1
+            if record.ttft_seconds is not None:
+                self._metrics[("time_to_first_token_seconds_sum", labels)] += (
+                    record.ttft_seconds
+                )
+                self._metrics[("time_to_first_token_seconds_count", labels)] += 1
+            for token_type, tokens in (
+                ("prompt", record.prompt_tokens),
+                ("completion", record.completion_tokens),
+            ):
+                if tokens:
+                    key = ("tokens_total", labels + (("type", token_type),))
+                    self._metrics[key] += tokens
+
+    def _write_records(self) -> None:
+        assert self.path is not None
+        with open(self.path, "a") as f:
+            while True:
+                record = self._records.get()
+                if record is None:
+                    return
+                f.write(json.dumps(asdict(record)) + "\n")
+                # Flush once the backlog is written instead of after every record.
+                if self._records.empty():
+                    f.flush()
+
+    def close(self) -> None:
+        """Write the pending records and stop the writer thread."""
+        if self._writer is not None:
+            self._records.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def render_prometheus(self) -> str:
+        """The aggregated metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+
+        families: defaultdict[str, list[str]] = defaultdict(list)
+        for (metric, labels), value in metrics:
+            family = metric.removesuffix("_sum").removesuffix("_count")
+            label_text = ",".join(
+                f'{key}="{_escape_label(label)}"' for key, label in labels
+            )
+            families[family].append(f"langchain_{metric}{{{label_text}}} {value}")
+
+        lines = []
+        for family, samples in families.items():
+            lines.append(f"# TYPE langchain_{family} {METRIC_TYPES[family]}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    # LLM and chat model runs
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(LLM, _run_name(serialized, kwargs), run_id, parent_run_id)
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(LLM, _run_name(serialized, kwargs), run_id, parent_run_id)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is not None and run.first_token is None:
+            run.first_token = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, *_token_counts(response))
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id, error=error)
+
+    # Tool runs
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(TOOL, _run_name(serialized, kwargs), run_id, parent_run_id)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id, error=error)
+
+    # Chain runs
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(CHAIN, _run_name(serialized, kwargs), run_id, parent_run_id)
+
+    def on_chain_end(
+        self, outputs: dict[str, Any], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id, error=error)
+
+
+def _run_name(serialized: dict[str, Any] | None, kwargs: dict[str, Any]) -> str:
+    if kwargs.get("name"):
+        return str(kwargs["name"])
+    if serialized:
+        if serialized.get("name"):
+            return str(serialized["name"])
+        if serialized.get("id"):
+            return str(serialized["id"][-1])
+    return "unknown"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _token_counts(response: LLMResult) -> tuple[int | None, int | None]:
+    """Prompt and completion tokens reported by the model, when available."""
+    prompt_tokens = completion_tokens = 0
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            if not isinstance(generation, ChatGeneration):
+                continue
+            usage = getattr(generation.message, "usage_metadata", None)
+            if usage:
+                found = True
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if found:
+        return prompt_tokens, completion_tokens
+
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")
+
+
+def start_metrics_server(
+    handler: TelemetryCallbackHandler, port: int, host: str = "0.0.0.0"
+) -> ThreadingHTTPServer:
+    """Serve `GET /metrics` in the Prometheus text format from a daemon thread."""
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = handler.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    threading.Thread(
+        target=server.serve_forever, name="telemetry-metrics", daemon=True
+    ).start()
+    return server
+
+
+@functools.cache
+def telemetry_handler() -> TelemetryCallbackHandler | None:
+    """
+    Return the process-wide telemetry handler, or None when telemetry is disabled.
+    """
+    path = os.getenv("TELEMETRY_PATH")
+    port = os.getenv("TELEMETRY_METRICS_PORT")
+    if not path and not port:
+        return None
+
+    handler = TelemetryCallbackHandler(path=path)
+    atexit.register(handler.close)
+    if port:
+        start_metrics_server(handler, int(port))
+    return handler
+
+
+def telemetry_callbacks() -> list[BaseCallbackHandler]:
+    """Callbacks to pass to models, chains and tools (empty when disabled)."""
+    handler = telemetry_handler()
+    return [handler] if handler is not None else []
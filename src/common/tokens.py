@@ -0,0 +1,15 @@
+"""
+Token counting helpers.
+"""
+
+CHARACTERS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text.
+
+    Uses the common approximation of four characters per token for English text,
+    which is close enough for budgeting prompts without loading a tokenizer.
+    """
+    return -(-len(text) // CHARACTERS_PER_TOKEN)
@@ -0,0 +1,229 @@
+"""
+Shared tool execution engine for the agent loops.
+
+`ToolExecutor` keeps the tools in a name registry, runs them on a thread pool with
+per-tool timeouts, dispatches independent calls concurrently and memoizes the results
+of tools marked with `@pure`, keyed by their validated arguments.
+
+Usage:
+    executor = ToolExecutor([get_text_length], timeouts={"get_text_length": 5})
+    executor.invoke("get_text_length", "Hello, world!")
+
+    # Route the calls of a LangChain `AgentExecutor` through the executor.
+    AgentExecutor(agent=agent, tools=executor.as_tools())
+"""
+
+import json
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool, StructuredTool, Tool
+from pydantic import BaseModel
+
+from src.common.singleflight import SingleFlight
+from src.common.ttl_cache import TTLCache
+
+PURE = "pure"
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool does not return within its timeout."""
+
+
+def pure[T: BaseTool](tool: T) -> T:
+    """
+    Mark a tool as pure: its result only depends on its arguments, so it is memoized.
+    """
+    tool.metadata = {**(tool.metadata or {}), PURE: True}
+    return tool
+
+
+def is_pure(tool: BaseTool) -> bool:
+    return bool((tool.metadata or {}).get(PURE))
+
+
+class ToolExecutor:
+    """
+    Tool registry with concurrent dispatch, timeouts and memoization of pure tools.
+    """
+
+    def __init__(
+        self,
+        tools: Iterable[BaseTool],
+        max_workers: int = 8,
+        default_timeout: float | None = None,
+        timeouts: dict[str, float] | None = None,
+        cache_size: int = 1024,
+    ) -> None:
+        self.registry: dict[str, BaseTool] = {}
+        for tool in tools:
+            if tool.name in self.registry:
+                raise ValueError(f"Duplicate tool name: {tool.name}")
+            self.registry[tool.name] = tool
+
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.cache: TTLCache[tuple[str, str], Any] = TTLCache(max_entries=cache_size)
+        self.in_flight: SingleFlight[tuple[str, str], Any] = SingleFlight()
+        self.calls = 0
+        self.timed_out = 0
+
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tool-worker"
+        )
+
+    def get(self, name: str) -> BaseTool:
+        """Find a tool by name."""
+        tool = self.registry.get(name)
+        if tool is None:
+            raise KeyError(
+                f"Unknown tool {name!r}, expected one of {list(self.registry)}"
+            )
+        return tool
+
+    def cache_key(self, tool: BaseTool, tool_input: str | dict[str, Any]) -> str:
+        """
+        The validated arguments of a call, so that `"5"` and `5` share an entry.
+        """
+        schema = tool.args_schema
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            if isinstance(tool_input, str):
+                # Single string inputs map to the only argument of the tool.
+                tool_input = {next(iter(schema.model_fields)): tool_input}
+            arguments: Any = schema.model_validate(tool_input).model_dump()
+        else:
+            arguments = tool_input
+        return json.dumps(arguments, sort_keys=True, default=str)
+
+    def submit(
+        self,
+        name: str,
+        tool_input: str | dict[str, Any],
+        config: RunnableConfig | None = None,
+    ) -> Future[Any]:
+        """Start a tool call on the pool, answering pure calls from the cache."""
+        tool = self.get(name)
+        with self._lock:
+            self.calls += 1
+
+        key = (name, self.cache_key(tool, tool_input)) if is_pure(tool) else None
+
+        def run() -> Any:
+            return tool.invoke(tool_input, config=config)
+
+        if key is None:
+            return self._pool.submit(run)
+
+        def run_pure() -> Any:
+            result = self.cache.get(key)
+            if result is None:
+                result = run()
+                self.cache.set(key, result)
+            return result
+
+        # Identical pure calls dispatched together only run the tool once.
+        return self._pool.submit(self.in_flight.do, key, run_pure)
+
+    def result(self, name: str, future: Future[Any]) -> Any:
+        """Wait for a call started with `submit`, up to the timeout of its tool."""
+        timeout = self.timeouts.get(name, self.default_timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as error:
+            # The worker thread cannot be interrupted, it finishes in the background.
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise ToolTimeoutError(
+                f"Tool {name!r} did not return within {timeout}s"
+            ) from error
+
+    def invoke(
+        self,
+        name: str,
+        tool_input: str | dict[str, Any],
+        config: RunnableConfig | None = None,
+    ) -> Any:
+        """Run a single tool call."""
+        return self.result(name, self.submit(name, tool_input, config=config))
+
+    def invoke_many(
+        self,
+        calls: list[tuple[str, str | dict[str, Any]]],
+        config: RunnableConfig | None = None,
+        return_exceptions: bool = False,
+    ) -> list[Any]:
+        """
+        Run independent tool calls concurrently and return their results in order.
+        With `return_exceptions`, failed calls return their exception instead of
+        raising it.
+        """
+        futures = [
+            (name, self.submit(name, tool_input, config=config))
+            for name, tool_input in calls
+        ]
+        results = []
+        for name, future in futures:
+            try:
+                results.append(self.result(name, future))
+            except Exception as error:
+                if not return_exceptions:
+                    raise
+                results.append(error)
+        return results
+
+    def as_tools(self) -> list[BaseTool]:
+        """
+        Tools with the same name, description and arguments that run through the
+        executor, to use it from LangChain agents such as `AgentExecutor`.
+        """
+        wrapped: list[BaseTool] = []
+        for name, tool in self.registry.items():
+            if isinstance(tool, Tool) or tool.args_schema is None:
+                wrapped.append(
+                    Tool(
+                        name=name,
+                        description=tool.description,
+                        func=self._string_caller(name),
+                    )
+                )
+            else:
+                wrapped.append(
+                    StructuredTool(
+                        name=name,
+                        description=tool.description,
+                        args_schema=tool.args_schema,
+                        func=self._keyword_caller(name),
+                    )
+                )
+        return wrapped
+
+    def _string_caller(self, name: str) -> Callable[[str], Any]:
+        def call(tool_input: str) -> Any:
+            return self.invoke(name, tool_input)
+
+        return call
+
+    def _keyword_caller(self, name: str) -> Callable[..., Any]:
+        def call(*args: Any, **kwargs: Any) -> Any:
+            # Single string inputs are passed positionally by `StructuredTool`.
+            return self.invoke(name, args[0] if args else kwargs)
+
+        return call
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "tools": len(self.registry),
+            "calls": self.calls,
+            "cache_hits": self.cache.hits,
+            "coalesced": self.in_flight.shared,
+            "timed_out": self.timed_out,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
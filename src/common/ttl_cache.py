@@ -0,0 +1,84 @@
+"""
+In-memory LRU cache with a time to live and hit/miss counters.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class TTLCache[K: Hashable, V]:
+    """
+    Thread-safe LRU cache whose entries expire `ttl_seconds` after being stored.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K, record: bool = True) -> V | None:
+        """
+        Return the value stored for `key`, or None if it is missing or expired.
+        With `record=False` the lookup is left out of the hit/miss counters, for
+        re-checks of a key whose lookup was already counted.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += record
+                return None
+
+            stored_at, value = entry
+            if self.ttl_seconds is not None and (
+                time.monotonic() - stored_at > self.ttl_seconds
+            ):
+                del self._entries[key]
+                self.misses += record
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += record
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        """
+        Store `value` for `key`, evicting the least recently used entries when full.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the size of the cache and its hit/miss counters.
+        """
+        with self._lock:
+            entries = len(self._entries)
+
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }